@@ -2,63 +2,1143 @@
 
 import base64
 import ast
-import builtins
 import contextlib
+import copy
+import csv
 import io
 import json
-import math
 import os
-import datetime
-import ipaddress
+import queue
 import itertools
 import functools
 import collections
+import hashlib
 import random
 import keyword
 import re
-import traceback
+import sqlite3
+import sys
+import tarfile
+import threading
+import time
 import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import PurePosixPath
 from typing import Any
 
-import jmespath
-import textfsm
-import xmltodict
-import yaml
-from flask import Flask, jsonify, render_template, request
-from jinja2 import Environment, StrictUndefined
-from jsonschema import ValidationError, validate
-from lxml import etree
-from ttp import ttp
+from flask import Flask, Response, jsonify, render_template, request, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+from jinja2 import Environment, FileSystemLoader, StrictUndefined
+from jinja2.meta import find_referenced_templates
+
+import configdiff
+import engines
+import metrics
+import playground
+import transport
+from metrics import phase
+from playground import parse_playground_var
+from workers import PoolSaturated, WorkerPool, WorkerStartError, WorkerTimeout
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from asgiref.wsgi import WsgiToAsgi
+except ImportError:
+    WsgiToAsgi = None
+
+# Parsing engines are imported on first use; see ENGINE_WARMUP to preload them.
+etree = engines.lazy("lxml.etree")
+jmespath = engines.lazy("jmespath")
+jsonschema = engines.lazy("jsonschema")
+textfsm = engines.lazy("textfsm")
+ttp = engines.lazy("ttp")
+xmltodict = engines.lazy("xmltodict")
+yaml = engines.lazy("yaml")
+
+if orjson is not None:
+    # Datetimes and dataclasses go through Flask's default() so output matches the
+    # stdlib provider (RFC 822 dates) whichever backend is active.
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+# orjson reads integers beyond 64 bits as floats. Any run of 19+ digits might be
+# one, so such documents are parsed by the stdlib instead.
+LONG_DIGITS = {str: re.compile(r"\d{19}"), bytes: re.compile(rb"\d{19}")}
+
+
+def json_bytes(obj: Any, pretty: bool = False, sort_keys: bool = False) -> bytes:
+    if orjson is not None:
+        option = ORJSON_OPTIONS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(obj, default=DefaultJSONProvider.default, option=option)
+        except TypeError:
+            # Integers beyond 64 bits and similar edge cases; let the stdlib decide.
+            pass
+    return json.dumps(
+        obj,
+        default=DefaultJSONProvider.default,
+        ensure_ascii=False,
+        sort_keys=sort_keys,
+        indent=2 if pretty else None,
+        separators=None if pretty else (",", ":"),
+    ).encode("utf-8")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    ensure_ascii = False
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return json_bytes(obj, sort_keys=self.sort_keys).decode("utf-8")
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        with phase("parse"):
+            if orjson is None or kwargs:
+                return super().loads(s, **kwargs)
+            pattern = LONG_DIGITS.get(type(s))
+            if pattern is None or pattern.search(s):
+                return super().loads(s)
+            return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        with phase("serialize"):
+            obj = self._prepare_response_obj(args, kwargs)
+            pretty = (self.compact is None and self._app.debug) or self.compact is False
+            body = json_bytes(obj, pretty=pretty, sort_keys=self.sort_keys) + b"\n"
+            return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def env_flag(name: str) -> Any:
+    value = os.environ.get(name, "").strip().lower()
+    if not value:
+        return None
+    return value in {"1", "true", "yes", "on"}
+
 
 app = Flask(__name__)
-FUNCTION_REPL_SESSIONS = {}
+app.json = FastJSONProvider(app)
+# JSON_COMPACT=1 forces compact responses, JSON_COMPACT=0 forces indentation;
+# unset keeps Flask's rule (indented only in debug mode).
+app.json.compact = env_flag("JSON_COMPACT")
+app.json.sort_keys = env_flag("JSON_SORT_KEYS") is not False
+if os.environ.get("METRICS_ENABLED", "1") != "0":
+    metrics.init_app(app)
+# gzip/zstd request bodies are always decoded; RESPONSE_COMPRESSION=0 stops compressing responses.
+transport.init_app(app, compress=os.environ.get("RESPONSE_COMPRESSION", "1") != "0")
+CACHE_REGISTRY = {}
+
+
+def content_hash(*parts: str) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class LRUCache:
+    def __init__(self, name: str, maxsize: int = 128):
+        self.name = name
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = collections.OrderedDict()
+        self._lock = threading.Lock()
+        CACHE_REGISTRY[name] = self
+
+    def get_or_create(self, key: str, factory):
+        # Returns (value, cached). The factory runs outside the lock so a slow compile
+        # does not block other lookups; a factory that raises leaves nothing cached.
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key], True
+            self.misses += 1
+
+        value = factory()
+        with self._lock:
+            # Another thread may have built the same entry meanwhile; keep the first one.
+            value = self._data.setdefault(key, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return value, False
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
 
 
-def parse_playground_var(raw_text: str):
-    text = (raw_text or "").strip()
-    if not text:
-        return {"value": None, "type": "NoneType", "warning": "Empty value loaded as None."}
+class TTLCache:
+    # LRU store whose entries also expire after ttl seconds of inactivity.
+    def __init__(self, name: str, maxsize: int = 16, ttl: float = 300.0):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._data = collections.OrderedDict()
+        self._lock = threading.Lock()
+        CACHE_REGISTRY[name] = self
+
+    def _purge(self, now: float) -> None:
+        expired = [key for key, (_, expires_at, _) in self._data.items() if expires_at <= now]
+        for key in expired:
+            del self._data[key]
+            self.expirations += 1
+
+    def put(self, key: str, value: Any, ttl: Any = None) -> float:
+        ttl = self.ttl if ttl is None else ttl
+        now = time.monotonic()
+        with self._lock:
+            self._purge(now)
+            self._data[key] = (value, now + ttl, ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return ttl
+
+    def get(self, key: str) -> Any:
+        # Returns None for unknown or expired keys; a hit refreshes the TTL.
+        now = time.monotonic()
+        with self._lock:
+            self._purge(now)
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, _, ttl = entry
+            self._data[key] = (value, now + ttl, ttl)
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def pop(self, key: str) -> Any:
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return entry[0] if entry else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._purge(time.monotonic())
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class ResponseCache:
+    # Finished response bodies keyed by a hash of endpoint + canonical payload, in a
+    # memory LRU bounded by total bytes with an optional SQLite tier that survives
+    # restarts. Disk hits are promoted back into memory.
+    def __init__(self, name: str, max_bytes: int, db_path: str = "", db_max_bytes: int = 0):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.db_max_bytes = db_max_bytes
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+        self._data = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.db_path = db_path
+        self._db = None
+        self._db_pid = None
+        self._db_lock = threading.Lock()
+        self._db_open_lock = threading.Lock()
+        self._db_writes = 0
+        CACHE_REGISTRY[name] = self
+
+    @staticmethod
+    def make_key(endpoint: str, canonical: bytes) -> str:
+        digest = hashlib.sha256(endpoint.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(canonical)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Any:
+        # Returns (body, mimetype) or None.
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry
+        entry = self._db_get(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self.hits += 1
+        self._store(key, entry)
+        return entry
+
+    def put(self, key: str, body: bytes, mimetype: str) -> None:
+        if len(body) > self.max_bytes // 4:
+            return
+        self._store(key, (body, mimetype))
+        self._db_put(key, body, mimetype)
+
+    def _store(self, key: str, entry: tuple) -> None:
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self.bytes -= len(previous[0])
+            self._data[key] = entry
+            self.bytes += len(entry[0])
+            while self.bytes > self.max_bytes and self._data:
+                _, (body, _) = self._data.popitem(last=False)
+                self.bytes -= len(body)
+                self.evictions += 1
+
+    def _connection(self) -> Any:
+        # Opened on first use in each process: gunicorn forks workers after import,
+        # and a SQLite connection must not be shared across a fork.
+        pid = os.getpid()
+        if self._db_pid != pid:
+            with self._db_open_lock:
+                if self._db_pid != pid:
+                    db = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+                    db.execute("PRAGMA journal_mode=WAL")
+                    db.execute("PRAGMA synchronous=NORMAL")
+                    db.execute(
+                        "CREATE TABLE IF NOT EXISTS responses "
+                        "(key TEXT PRIMARY KEY, mimetype TEXT, body BLOB, accessed REAL)"
+                    )
+                    self._db_lock = threading.Lock()
+                    self._db = db
+                    self._db_pid = pid
+        return self._db
+
+    def _db_get(self, key: str) -> Any:
+        if not self.db_path:
+            return None
+        db = self._connection()
+        with self._db_lock:
+            row = db.execute("SELECT body, mimetype FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+        return (bytes(row[0]), row[1]) if row is not None else None
+
+    def _db_put(self, key: str, body: bytes, mimetype: str) -> None:
+        if not self.db_path:
+            return
+        db = self._connection()
+        with self._db_lock:
+            db.execute(
+                "INSERT OR REPLACE INTO responses (key, mimetype, body, accessed) VALUES (?, ?, ?, ?)",
+                (key, mimetype, body, time.time()),
+            )
+            self._db_writes += 1
+            if self.db_max_bytes and self._db_writes % 64 == 0:
+                self._db_prune(db)
+
+    def _db_prune(self, db) -> None:
+        # Drop the least recently used tenth of rows while over the byte budget.
+        (total,) = db.execute("SELECT COALESCE(SUM(LENGTH(body)), 0) FROM responses").fetchone()
+        if total <= self.db_max_bytes:
+            return
+        (count,) = db.execute("SELECT COUNT(*) FROM responses").fetchone()
+        db.execute(
+            "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY accessed LIMIT ?)",
+            (max(1, count // 10),),
+        )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+        if self.db_path:
+            db = self._connection()
+            with self._db_lock:
+                db.execute("DELETE FROM responses")
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "disk": bool(self.db_path),
+            }
 
-    try:
-        value = ast.literal_eval(text)
-        return {"value": value, "type": type(value).__name__, "warning": ""}
-    except Exception:
-        pass
 
+def cache_size_from_env(name: str, default: int) -> int:
     try:
-        value = json.loads(text)
-        return {"value": value, "type": type(value).__name__, "warning": ""}
-    except Exception:
-        pass
+        return max(1, int(os.environ.get(name, default)))
+    except ValueError:
+        return default
+
+
+# RESPONSE_CACHE_MB=0 disables the response cache; RESPONSE_CACHE_DB adds the SQLite tier.
+RESPONSE_CACHE_MB = float(os.environ.get("RESPONSE_CACHE_MB", "64"))
+RESPONSE_CACHE = (
+    ResponseCache(
+        "responses",
+        int(RESPONSE_CACHE_MB * 1024 * 1024),
+        os.environ.get("RESPONSE_CACHE_DB", ""),
+        int(float(os.environ.get("RESPONSE_CACHE_DB_MB", "512")) * 1024 * 1024),
+    )
+    if RESPONSE_CACHE_MB > 0
+    else None
+)
+TEXTFSM_CACHE = LRUCache("textfsm", cache_size_from_env("TEXTFSM_CACHE_SIZE", 128))
+TEXTFSM_POOL_SIZE = 8
+
+
+# Compiled TextFSM template plus a small pool of idle state machines built from it.
+class TextFSMTemplate:
+    def __init__(self, template_text: str):
+        self.template_text = template_text
+        first = textfsm.TextFSM(io.StringIO(template_text))
+        self.header = list(first.header)
+        self._idle = collections.deque([first])
+
+    def parse(self, raw_text: str) -> list:
+        # TextFSM keeps per-parse state on the instance, so each parse checks out
+        # its own machine and resets it before handing it back to the pool.
+        try:
+            parser = self._idle.pop()
+        except IndexError:
+            parser = textfsm.TextFSM(io.StringIO(self.template_text))
+        try:
+            parser.Reset()
+            return parser.ParseText(raw_text)
+        finally:
+            parser.Reset()
+            if len(self._idle) < TEXTFSM_POOL_SIZE:
+                self._idle.append(parser)
+
+
+def get_textfsm_template(template_text: str):
+    return TEXTFSM_CACHE.get_or_create(
+        content_hash(template_text), lambda: TextFSMTemplate(template_text)
+    )
+
+
+JINJA_ENV = Environment(undefined=StrictUndefined, trim_blocks=True, lstrip_blocks=True)
+JINJA_CACHE = LRUCache("jinja2", cache_size_from_env("JINJA_CACHE_SIZE", 256))
+
+
+def get_jinja_template(template_text: str):
+    # Environment is safe to share across threads once configured; compiled
+    # Template objects are immutable and can be rendered concurrently.
+    return JINJA_CACHE.get_or_create(
+        content_hash(template_text), lambda: JINJA_ENV.from_string(template_text)
+    )
+
+
+TTP_CACHE = LRUCache("ttp", cache_size_from_env("TTP_CACHE_SIZE", 64))
+TTP_POOL_SIZE = 4
+
+
+# Parsed TTP template plus a pool of idle ttp objects; inputs and results are
+# cleared between uses instead of re-parsing the template XML every request.
+class TTPTemplate:
+    def __init__(self, template_text: str):
+        self.template_text = template_text
+        self._idle = collections.deque([ttp.ttp(template=template_text)])
+
+    def parse(self, inputs: list, one: bool = False) -> list:
+        try:
+            parser = self._idle.pop()
+        except IndexError:
+            parser = ttp.ttp(template=self.template_text)
+        try:
+            parser.clear_input()
+            parser.clear_result()
+            for data in inputs:
+                parser.add_input(data)
+            parser.parse(one=one)
+            # clear_result() empties the per-template containers in place, so hand
+            # back copies before the parser is reused.
+            return [copy.copy(results) for results in parser.result()]
+        finally:
+            parser.clear_input()
+            parser.clear_result()
+            if len(self._idle) < TTP_POOL_SIZE:
+                self._idle.append(parser)
+
+
+def get_ttp_template(template_text: str):
+    return TTP_CACHE.get_or_create(content_hash(template_text), lambda: TTPTemplate(template_text))
+
+
+TEMPLATE_EXTENSIONS = {
+    "textfsm": (".textfsm", ".template", ".tpl"),
+    "ttp": (".ttp", ".txt", ".xml"),
+    "jinja2": (".j2", ".jinja2", ".jinja"),
+}
+
+
+def expand_command_completion(value: str) -> str:
+    # CliTable syntax: "sh[[ow]]" matches sh, sho and show.
+    return re.sub(r"\[\[(.+?)\]\]", lambda m: "(" + "(".join(m.group(1)) + ")?" * len(m.group(1)), value)
+
+
+def parse_template_index(text: str) -> list:
+    # ntc-templates index: "#" comments, a "Template, Hostname, Platform, Command"
+    # header, then one row per template. Every column but Template is a regex that
+    # must match the start of the requested attribute; the first matching row wins.
+    lines = [line for line in text.splitlines() if line.strip() and not line.lstrip().startswith("#")]
+    if not lines:
+        return []
+    header = [column.strip() for column in lines[0].split(",")]
+    if "Template" not in header:
+        raise ValueError("TextFSM index has no Template column.")
+    rows = []
+    for line in lines[1:]:
+        values = dict(zip(header, (value.strip() for value in line.split(",", len(header) - 1))))
+        patterns = {
+            column.lower(): re.compile(expand_command_completion(value) if column == "Command" else value)
+            for column, value in values.items()
+            if column != "Template" and value
+        }
+        rows.append((values.get("Template", ""), patterns))
+    return rows
+
+
+class TemplateLibrary:
+    # Named templates read from <root>/textfsm, <root>/ttp and <root>/jinja2. Files
+    # are read on first use and re-read when their mtime or size changes (stat is
+    # rate-limited by check_interval); compiled objects come from the content-hash
+    # caches, so an edited file simply compiles to a new entry.
+    def __init__(self, root: str, textfsm_dir: str = "", check_interval: float = 1.0):
+        self.root = os.path.abspath(root)
+        self.dirs = {kind: os.path.join(self.root, kind) for kind in TEMPLATE_EXTENSIONS}
+        if textfsm_dir:
+            self.dirs["textfsm"] = os.path.abspath(textfsm_dir)
+        self.check_interval = check_interval
+        self.loads = 0
+        self.reloads = 0
+        self._entries = {}
+        self._index = None
+        self._index_matches = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, kind: str, name: str) -> str:
+        base = os.path.realpath(self.dirs[kind])
+        for candidate in [name] + [name + ext for ext in TEMPLATE_EXTENSIONS[kind]]:
+            path = os.path.realpath(os.path.join(base, candidate))
+            if not path.startswith(base + os.sep):
+                raise ValueError(f"Invalid template name: {name}")
+            if os.path.isfile(path):
+                return path
+        raise ValueError(f"Unknown {kind} template: {name}")
+
+    def get(self, kind: str, name: str) -> tuple:
+        # Returns (text, digest).
+        key = (kind, name)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry["checked"] < self.check_interval:
+                return entry["text"], entry["digest"]
+        path = entry["path"] if entry is not None else self.resolve(kind, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._entries.pop(key, None)
+            path = self.resolve(kind, name)
+            stat = os.stat(path)
+            entry = None
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if entry is not None and entry["signature"] == signature:
+            entry["checked"] = now
+            return entry["text"], entry["digest"]
+        with open(path, encoding="utf-8") as handle:
+            text = handle.read()
+        with self._lock:
+            if entry is None:
+                self.loads += 1
+            else:
+                self.reloads += 1
+            self._entries[key] = {
+                "path": path,
+                "signature": signature,
+                "text": text,
+                "digest": content_hash(text),
+                "checked": now,
+            }
+        return text, self._entries[key]["digest"]
+
+    def names(self, kind: str) -> list:
+        base = self.dirs[kind]
+        if not os.path.isdir(base):
+            return []
+        return sorted(
+            os.path.relpath(os.path.join(folder, filename), base).replace(os.sep, "/")
+            for folder, _, filenames in os.walk(base)
+            for filename in filenames
+            if filename.lower().endswith(TEMPLATE_EXTENSIONS[kind])
+        )
+
+    def _index_rows(self) -> list:
+        path = os.path.join(self.dirs["textfsm"], "index")
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            raise ValueError("No TextFSM index in the template library.") from None
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if self._index is not None and self._index[0] == signature:
+                return self._index[1]
+        with open(path, encoding="utf-8") as handle:
+            rows = parse_template_index(handle.read())
+        with self._lock:
+            self._index = (signature, rows)
+            self._index_matches.clear()
+        return rows
+
+    def match_textfsm(self, attributes: dict) -> str:
+        # Precompiled index lookup with memoized answers, like CliTable.GetRowMatch.
+        rows = self._index_rows()
+        key = tuple(sorted((k.lower(), " ".join(str(v).split())) for k, v in attributes.items() if v))
+        with self._lock:
+            if key in self._index_matches:
+                return self._index_matches[key]
+        template = ""
+        for names, patterns in rows:
+            if all(column not in patterns or patterns[column].match(value) for column, value in key):
+                template = names
+                break
+        if not template:
+            raise ValueError("No TextFSM template in the index matches " + ", ".join(f"{k}={v}" for k, v in key))
+        if ":" in template:
+            raise ValueError(f"Multi-template index rows are not supported: {template}")
+        with self._lock:
+            self._index_matches[key] = template
+        return template
+
+    def preload(self) -> int:
+        compilers = {"textfsm": get_textfsm_template, "ttp": get_ttp_template, "jinja2": get_jinja_template}
+        count = 0
+        for kind, compile_template in compilers.items():
+            for name in self.names(kind):
+                compile_template(self.get(kind, name)[0])
+                count += 1
+        return count
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"root": self.root, "entries": len(self._entries), "loads": self.loads, "reloads": self.reloads}
+
+
+TEMPLATE_LIBRARY = TemplateLibrary(
+    os.environ.get("TEMPLATE_LIBRARY") or os.path.join(app.root_path, "template_library"),
+    os.environ.get("TEXTFSM_TEMPLATE_DIR", ""),
+)
+if os.path.isdir(TEMPLATE_LIBRARY.dirs["jinja2"]):
+    # Lets inline templates {% include %} / {% extends %} library templates.
+    JINJA_ENV.loader = FileSystemLoader(TEMPLATE_LIBRARY.dirs["jinja2"])
+if os.environ.get("TEMPLATE_LIBRARY_PRELOAD", "0") == "1":
+    TEMPLATE_LIBRARY.preload()
+
+
+def library_template(kind: str, payload: Any) -> Any:
+    # Returns (text, name, digest) for a payload that names a library template
+    # ("template_name", or "platform" + "command" for TextFSM), otherwise None.
+    name = payload.get("template_name") or ""
+    if not name and kind == "textfsm" and payload.get("command"):
+        if not payload.get("platform"):
+            # Without a platform any vendor's row would match the command.
+            raise ValueError("platform is required with command for a TextFSM index lookup.")
+        attributes = {"Command": payload.get("command"), "Platform": payload.get("platform")}
+        if payload.get("hostname"):
+            attributes["Hostname"] = payload.get("hostname")
+        name = TEMPLATE_LIBRARY.match_textfsm(attributes)
+    if not name:
+        return None
+    text, digest = TEMPLATE_LIBRARY.get(kind, name)
+    return text, name, digest
+
+
+def jinja_library_references(source: str) -> Any:
+    # Digests of every library template the source includes, imports or extends,
+    # followed transitively; None when a reference is dynamic or unresolvable.
+    if JINJA_ENV.loader is None:
+        return ""
+    digests = []
+    pending, seen = [source], set()
+    while pending:
+        try:
+            names = list(find_referenced_templates(JINJA_ENV.parse(pending.pop())))
+        except Exception:
+            return None
+        for name in names:
+            if name is None:
+                return None
+            if name in seen:
+                continue
+            seen.add(name)
+            try:
+                text, digest = TEMPLATE_LIBRARY.get("jinja2", name)
+            except (OSError, ValueError):
+                return None
+            digests.append(f"{name}={digest}")
+            pending.append(text)
+    return "\0".join(digests)
+
+
+def payload_template(kind: str, payload: Any) -> tuple:
+    # Returns (template text, library name or None) for inline or named templates.
+    named = library_template(kind, payload)
+    if named is None:
+        return payload.get("template", ""), None
+    return named[0], named[1]
+
+
+XPATH_CACHE = LRUCache("xpath", cache_size_from_env("XPATH_CACHE_SIZE", 512))
+XPATH_DOCUMENTS = TTLCache("xpath_documents", cache_size_from_env("XPATH_DOCUMENT_LIMIT", 16), 300.0)
+XPATH_DOCUMENT_MAX_TTL = 3600
+# Stored documents live in one process's memory; serve() records its worker count
+# so keep can be refused when follow-up queries may land on another worker.
+WEB_PROCESSES = 1
+
+
+def get_xpath(expression: str, namespaces: Any = None):
+    # Compiled XPath objects serialise evaluation internally, so one instance can
+    # be shared by all request threads.
+    namespaces = namespaces or None
+    key = content_hash(expression, json.dumps(namespaces, sort_keys=True))
+    return XPATH_CACHE.get_or_create(key, lambda: etree.XPath(expression, namespaces=namespaces))
+
+
+def format_xpath_matches(matches: Any) -> list:
+    if not isinstance(matches, list):
+        matches = [matches]
+    output = []
+    for item in matches:
+        if isinstance(item, etree._Element):
+            output.append(etree.tostring(item, encoding="unicode", pretty_print=True).strip())
+        else:
+            output.append(str(item))
+    return output
+
+
+SCHEMA_CACHE = LRUCache("json_schema", cache_size_from_env("SCHEMA_CACHE_SIZE", 128))
+
+
+def get_schema_validator(schema: Any, format_check: bool = False):
+    # check_schema (the meta-schema pass) and validator construction run once per schema.
+    def build():
+        cls = jsonschema.validators.validator_for(schema)
+        cls.check_schema(schema)
+        return cls(schema, format_checker=cls.FORMAT_CHECKER if format_check else None)
+
+    key = content_hash(json_bytes(schema, sort_keys=True).decode("utf-8"), str(bool(format_check)))
+    return SCHEMA_CACHE.get_or_create(key, build)
+
+
+def validate_instance(validator, instance: Any) -> None:
+    # Same error selection as jsonschema.validate().
+    error = jsonschema.exceptions.best_match(validator.iter_errors(instance))
+    if error is not None:
+        raise error
+
+
+def describe_validation_error(error: Any) -> dict:
+    return {
+        "message": error.message,
+        "path": list(error.path),
+        "schema_path": list(error.schema_path),
+        "validator": error.validator,
+    }
+
+
+def iter_ndjson(lines):
+    # Yields (index, record, error) per non-blank line without reading ahead.
+    index = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield index, json.loads(line), None
+        except ValueError as exc:
+            yield index, None, f"Invalid JSON: {exc}"
+        index += 1
+
+
+def iter_json_records(source: Any, fmt: str):
+    # source is text, a binary stream or an already-decoded list; "ndjson" is
+    # consumed line by line, "json" must be an array (or one document) and is loaded whole.
+    if isinstance(source, list):
+        for index, record in enumerate(source):
+            yield index, record, None
+        return
+    if fmt == "ndjson":
+        if isinstance(source, str):
+            lines = io.StringIO(source)
+        else:
+            lines = io.TextIOWrapper(source, encoding="utf-8")
+        yield from iter_ndjson(lines)
+        return
+    if fmt != "json":
+        raise ValueError("Record format must be json or ndjson.")
+    data = json.loads(source if isinstance(source, str) else source.read())
+    records = data if isinstance(data, list) else [data]
+    for index, record in enumerate(records):
+        yield index, record, None
+
+
+JMESPATH_CACHE = LRUCache("jmespath", cache_size_from_env("JMESPATH_CACHE_SIZE", 512))
+
+
+def get_jmespath(expression: str):
+    return JMESPATH_CACHE.get_or_create(content_hash(expression), lambda: jmespath.compile(expression))
+
+
+REGEX_CACHE = LRUCache("regex", cache_size_from_env("REGEX_CACHE_SIZE", 256))
+REGEX_FLAGS = {
+    "i": re.IGNORECASE,
+    "ignorecase": re.IGNORECASE,
+    "m": re.MULTILINE,
+    "multiline": re.MULTILINE,
+    "s": re.DOTALL,
+    "dotall": re.DOTALL,
+    "x": re.VERBOSE,
+    "verbose": re.VERBOSE,
+    "a": re.ASCII,
+    "ascii": re.ASCII,
+}
+REGEX_TIMEOUT = float(os.environ.get("REGEX_TIMEOUT", "2"))
+REGEX_TIMEOUT_MESSAGE = (
+    f"Regex evaluation exceeded {REGEX_TIMEOUT:g}s and was stopped (likely catastrophic backtracking)."
+)
+REGEX_PAGE_SIZE = cache_size_from_env("REGEX_PAGE_SIZE", 1000)
+REGEX_MAX_PAGE_SIZE = 10000
+REGEX_MAX_BYTES = cache_size_from_env("REGEX_MAX_BYTES", 1024 * 1024)
+# REGEX_WORKERS=0 evaluates in the request thread with no timeout.
+REGEX_POOL = WorkerPool("regex", int(os.environ.get("REGEX_WORKERS", "2")), max_queue=32)
+
+
+def parse_regex_flags(raw_flags: Any) -> int:
+    # Accepts "ims", ["IGNORECASE", "MULTILINE"] or "i,m".
+    if not raw_flags:
+        return 0
+    if isinstance(raw_flags, str):
+        names = [part for part in re.split(r"[\s,|]+", raw_flags) if part]
+        if len(names) == 1 and names[0].lower() not in REGEX_FLAGS:
+            names = list(names[0])
+    else:
+        names = [str(name) for name in raw_flags]
+    flags = 0
+    for name in names:
+        key = name.lower().removeprefix("re.")
+        if key not in REGEX_FLAGS:
+            raise ValueError(f"Unknown regex flag: {name}")
+        flags |= REGEX_FLAGS[key]
+    return flags
+
+
+def get_regex(pattern: str, flags: int = 0):
+    return REGEX_CACHE.get_or_create(content_hash(pattern, str(flags)), lambda: re.compile(pattern, flags))
+
+
+# CPU-heavy single-document handlers run in a bounded pool of engine processes so
+# one slow parse cannot starve other requests of the GIL. ENGINE_WORKERS=0 runs
+# them in the request thread. Requests beyond ENGINE_MAX_QUEUE waiting callers, or
+# waiting longer than ENGINE_QUEUE_TIMEOUT seconds, are rejected with 503.
+ENGINE_POOL = WorkerPool(
+    "engine",
+    int(os.environ.get("ENGINE_WORKERS", str(min(4, os.cpu_count() or 1)))),
+    max_queue=int(os.environ.get("ENGINE_MAX_QUEUE", "32")),
+    queue_timeout=float(os.environ.get("ENGINE_QUEUE_TIMEOUT", "2")),
+)
+ENGINE_TIMEOUT = float(os.environ.get("ENGINE_TIMEOUT", "60"))
+# Worker processes for batch endpoints with processes: true. Items wait longer for a
+# free worker than single requests do, since one batch keeps several busy at once.
+BATCH_POOL = WorkerPool(
+    "batch",
+    int(os.environ.get("BATCH_PROCESS_WORKERS", str(min(4, os.cpu_count() or 1)))),
+    max_queue=int(os.environ.get("BATCH_MAX_QUEUE", "64")),
+    queue_timeout=float(os.environ.get("BATCH_QUEUE_TIMEOUT", "30")),
+)
+
+
+def engine_call(func, *args):
+    # Runs inside a worker process. Compiled-template caches live there, so the
+    # worker's cache counters travel back with each result.
+    result = func(*args)
+    counters = {
+        name: cache.stats()
+        for name, cache in CACHE_REGISTRY.items()
+        if isinstance(cache, LRUCache) and cache.hits + cache.misses
+    }
+    return result, os.getpid(), counters
+
+
+class WorkerCacheStats:
+    # Latest cache counters reported by each worker process, keyed by pid. Hits,
+    # misses and evictions of retired workers still count; their entries do not.
+    def __init__(self, pools: tuple):
+        self.pools = pools
+        self._reports = {}
+        self._lock = threading.Lock()
+
+    def update(self, pid: int, counters: dict) -> None:
+        with self._lock:
+            self._reports[pid] = counters
+
+    def merged(self, name: str, stats: dict) -> dict:
+        live = set().union(*(pool.pids() for pool in self.pools))
+        with self._lock:
+            reports = [(pid, counters[name]) for pid, counters in self._reports.items() if name in counters]
+        if not reports:
+            return stats
+        merged = dict(stats)
+        for pid, counters in reports:
+            for key in ("hits", "misses", "evictions"):
+                merged[key] += counters[key]
+            if pid in live:
+                merged["size"] += counters["size"]
+        lookups = merged["hits"] + merged["misses"]
+        merged["hit_ratio"] = round(merged["hits"] / lookups, 4) if lookups else 0.0
+        merged["processes"] = 1 + sum(1 for pid, _ in reports if pid in live)
+        return merged
+
+
+WORKER_CACHE_STATS = WorkerCacheStats((ENGINE_POOL, REGEX_POOL, BATCH_POOL))
+
+
+def call_worker_pool(pool: WorkerPool, timeout: float, func, *args):
+    result, pid, counters = pool.call(engine_call, func, *args, timeout=timeout)
+    WORKER_CACHE_STATS.update(pid, counters)
+    return result
+
+
+def run_engine_job(func, *args):
+    with phase("engine"):
+        if ENGINE_POOL.size <= 0:
+            return func(*args)
+        return call_worker_pool(ENGINE_POOL, ENGINE_TIMEOUT, func, *args)
+
+
+def run_regex_job(func, *args):
+    with phase("engine"):
+        if REGEX_POOL.size <= 0:
+            return func(*args)
+        return call_worker_pool(REGEX_POOL, REGEX_TIMEOUT, func, *args)
+
 
-    # Fallback to raw string so session can still start with user input.
+def cache_stats_snapshot() -> dict:
+    # Web-process caches merged with what the engine and regex workers reported.
     return {
-        "value": raw_text,
-        "type": "str",
-        "warning": "Could not parse as Python literal/JSON. Loaded as plain string.",
+        name: WORKER_CACHE_STATS.merged(name, cache.stats()) if isinstance(cache, LRUCache) else cache.stats()
+        for name, cache in CACHE_REGISTRY.items()
     }
 
 
+def regex_scan(pattern: str, flags: int, text: str, offset: int, max_matches: int, max_bytes: int) -> dict:
+    # Runs in a regex worker process. Returns one page of matches starting at match
+    # index `offset`, capped by match count and by total matched bytes.
+    compiled, cached = get_regex(pattern, flags)
+    matches = []
+    size = 0
+    has_more = False
+    truncated = False
+    for index, m in enumerate(compiled.finditer(text)):
+        if index < offset:
+            continue
+        if len(matches) >= max_matches:
+            has_more = True
+            break
+        groups = list(m.groups())
+        size += len(m.group(0)) + sum(len(group) for group in groups if group)
+        if size > max_bytes and matches:
+            has_more = truncated = True
+            break
+        matches.append({"match": m.group(0), "groups": groups, "start": m.start(), "end": m.end()})
+    return {
+        "count": len(matches),
+        "matches": matches,
+        "offset": offset,
+        "next_offset": offset + len(matches) if has_more else None,
+        "truncated": truncated,
+        "cached": cached,
+    }
+
+
+def regex_scan_lines(patterns: list, text: str, max_spans: int) -> dict:
+    # Runs in a regex worker process. One pass over the lines; every named pattern
+    # is tried on each line and reports its total count plus the first spans.
+    results = {name: {"count": 0, "spans": []} for name, _, _ in patterns}
+    compiled = [(name, get_regex(pattern, flags)[0]) for name, pattern, flags in patterns]
+    line_start = 0
+    for line_no, line in enumerate(text.splitlines(keepends=True), start=1):
+        for name, regex in compiled:
+            for m in regex.finditer(line):
+                entry = results[name]
+                entry["count"] += 1
+                if len(entry["spans"]) < max_spans:
+                    entry["spans"].append(
+                        {
+                            "line": line_no,
+                            "start": line_start + m.start(),
+                            "end": line_start + m.end(),
+                            "match": m.group(0),
+                        }
+                    )
+        line_start += len(line)
+    return results
+
+
+BATCH_MAX_WORKERS = cache_size_from_env("BATCH_MAX_WORKERS", min(32, (os.cpu_count() or 1) + 4))
+BATCH_MAX_ITEMS = cache_size_from_env("BATCH_MAX_ITEMS", 5000)
+
+
+def normalize_batch_inputs(raw_items: Any, text_key: str = "text", text_only: bool = True) -> list:
+    # Accepts {"name": value, ...} or [{"name": ..., text_key: value}, ...]; returns [(name, value)].
+    # text_key=None keeps whole list items as values.
+    if isinstance(raw_items, dict):
+        items = [(str(name), value) for name, value in raw_items.items()]
+    elif isinstance(raw_items, list):
+        items = []
+        for idx, item in enumerate(raw_items):
+            if isinstance(item, str):
+                items.append((str(idx), item))
+            elif isinstance(item, dict):
+                items.append((str(item.get("name", idx)), item if text_key is None else item.get(text_key, "")))
+            else:
+                raise ValueError(f"Batch item {idx} must be a string or an object.")
+    else:
+        raise ValueError("Batch inputs must be an object or a list.")
+
+    if not items:
+        raise ValueError("At least one batch input is required.")
+    if len(items) > BATCH_MAX_ITEMS:
+        raise ValueError(f"Batch is limited to {BATCH_MAX_ITEMS} inputs.")
+    names = [name for name, _ in items]
+    if len(set(names)) != len(names):
+        raise ValueError("Batch input names must be unique.")
+    if text_only:
+        for name, text in items:
+            if not isinstance(text, str):
+                raise ValueError(f"Input for {name!r} must be a string.")
+    return items
+
+
+def batch_process_item(func, *args) -> dict:
+    try:
+        return call_worker_pool(BATCH_POOL, ENGINE_TIMEOUT, func, *args)
+    except Exception as exc:
+        return {"ok": False, "error": str(exc)}
+
+
+def iter_batch(func, jobs: list, workers: Any = None, processes: bool = False):
+    # Returns an iterator of (name, result) for each (name, args) job, in completion
+    # order; func must not raise. processes=True runs func in BATCH_POOL (it must be a
+    # picklable module-level function) and raises PoolSaturated now, before any
+    # response is sent, when the batch would overflow the pool's queue.
+    try:
+        max_workers = int(workers or BATCH_MAX_WORKERS)
+    except (TypeError, ValueError):
+        max_workers = BATCH_MAX_WORKERS
+    max_workers = max(1, min(max_workers, BATCH_MAX_WORKERS, len(jobs)))
+    if processes and BATCH_POOL.size > 0:
+        max_workers = min(max_workers, BATCH_POOL.size)
+        BATCH_POOL.admit(max_workers)
+        func = functools.partial(batch_process_item, func)
+    return run_batch_jobs(func, jobs, max_workers)
+
+
+def run_batch_jobs(func, jobs: list, max_workers: int):
+    if max_workers == 1:
+        for name, args in jobs:
+            yield name, func(*args)
+        return
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(func, *args): name for name, args in jobs}
+        try:
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def ndjson_response(lines):
+    def generate():
+        for item in lines:
+            yield json_bytes(item) + b"\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+def batch_response(results, order: list, extra: Any = None, stream: bool = False):
+    # results yields (name, {"ok": bool, ...}) in completion order.
+    extra = extra or {}
+    if stream:
+
+        def lines():
+            total = errors = 0
+            for name, outcome in results:
+                total += 1
+                errors += 0 if outcome.get("ok") else 1
+                yield {"name": name, **outcome}
+            yield {"done": True, "count": total, "errors": errors, **extra}
+
+        return ndjson_response(lines())
+
+    collected = dict(results)
+    ordered = {name: collected[name] for name in order if name in collected}
+    errors = sum(1 for outcome in ordered.values() if not outcome.get("ok"))
+    return jsonify({"ok": True, **extra, "count": len(ordered), "errors": errors, "results": ordered})
+
+
+def textfsm_batch_item(template_text: str, raw_text: str) -> dict:
+    try:
+        compiled, _ = get_textfsm_template(template_text)
+        rows = compiled.parse(raw_text)
+        return {"ok": True, "records": [dict(zip(compiled.header, row)) for row in rows]}
+    except Exception as exc:
+        return {"ok": False, "error": str(exc)}
+
+
 @app.get("/")
 def index() -> str:
     return render_template("index.html")
@@ -68,64 +1148,419 @@ def error_response(message: str, status_code: int = 400):
     return jsonify({"ok": False, "error": message}), status_code
 
 
+def engine_error_response(exc: Exception, timeout_message: str = ""):
+    if isinstance(exc, PoolSaturated):
+        response, status_code = error_response(str(exc), 503)
+        response.headers["Retry-After"] = "1"
+        return response, status_code
+    if isinstance(exc, WorkerStartError):
+        # A server fault, not a bad request.
+        app.logger.error("%s", exc)
+        return error_response(str(exc), 500)
+    if isinstance(exc, WorkerTimeout):
+        return error_response(timeout_message or f"Processing exceeded {ENGINE_TIMEOUT:g}s and was stopped.", 504)
+    return error_response(str(exc))
+
+
+LIBRARY_TEMPLATE_ROUTES = {"/api/textfsm": "textfsm", "/api/ttp": "ttp", "/api/jinja2": "jinja2"}
+
+
+def stored_body(response) -> bytes:
+    # Every replay of a stored body is a cache hit, so a view's own
+    # "cached": false (compiled template reuse) is stored as true.
+    body = response.get_data()
+    if response.mimetype != "application/json":
+        return body
+    data = app.json.loads(body)
+    if not isinstance(data, dict) or data.get("cached") is not False:
+        return body
+    return app.json.response({**data, "cached": True}).get_data()
+
+
+def cache_response(view):
+    # For views that are pure functions of their JSON payload. A matching
+    # If-None-Match gets 304 without running the view; stored bodies are replayed
+    # as-is. Only 200 responses are stored; "Cache-Control: no-cache" forces a rerun.
+    @functools.wraps(view)
+    def wrapper(*args: Any, **kwargs: Any):
+        if RESPONSE_CACHE is None:
+            return view(*args, **kwargs)
+        if raw_body_request():
+            # Raw uploads key on the query options plus the body bytes.
+            payload = request.args.to_dict()
+            canonical = json_bytes(payload, sort_keys=True) + b"\0" + request.get_data()
+        else:
+            payload = request.get_json(silent=True)
+            if payload is None:
+                return view(*args, **kwargs)
+            canonical = json_bytes(payload, sort_keys=True)
+        kind = LIBRARY_TEMPLATE_ROUTES.get(request.path)
+        if kind is not None and isinstance(payload, dict):
+            # Key on the named template's content so an edited library file misses.
+            try:
+                named = library_template(kind, payload)
+            except (OSError, ValueError):
+                return view(*args, **kwargs)
+            if named is not None:
+                canonical += named[2].encode("ascii")
+            if kind == "jinja2":
+                # Included library files are part of the render, so key on them too.
+                references = jinja_library_references(payload.get("template", "") if named is None else named[0])
+                if references is None:
+                    return view(*args, **kwargs)
+                canonical += references.encode("utf-8")
+        key = ResponseCache.make_key(request.path, canonical)
+        etag = key[:32]
+        if request.if_none_match.contains_weak(etag):
+            response = app.response_class(status=304)
+            response.set_etag(etag)
+            return response
+        entry = None if request.cache_control.no_cache else RESPONSE_CACHE.get(key)
+        if entry is not None:
+            response = app.response_class(entry[0], mimetype=entry[1])
+            response.headers["X-Response-Cache"] = "hit"
+        else:
+            response = app.make_response(view(*args, **kwargs))
+            if response.status_code != 200 or response.is_streamed:
+                return response
+            RESPONSE_CACHE.put(key, stored_body(response), response.mimetype)
+            response.headers["X-Response-Cache"] = "miss"
+        response.set_etag(etag)
+        return response
+
+    return wrapper
+
+
+FORM_MIMETYPES = {"multipart/form-data", "application/x-www-form-urlencoded"}
+
+
+def raw_body_request() -> bool:
+    return bool(request.mimetype) and not request.is_json and request.mimetype not in FORM_MIMETYPES
+
+
+def request_payload(text_field: str) -> dict:
+    # JSON body; a multipart form where any field may be a file upload; or the raw
+    # body as text_field with the other fields as query args. The upload modes spare
+    # clients from JSON-escaping multi-MB documents.
+    if raw_body_request():
+        payload = request.args.to_dict()
+        with phase("parse"):
+            payload[text_field] = request.get_data().decode("utf-8", errors="replace")
+        return payload
+    if request.mimetype in FORM_MIMETYPES:
+        with phase("parse"):
+            payload = request.form.to_dict()
+            for name, upload in request.files.items():
+                payload[name] = upload.read().decode("utf-8", errors="replace")
+        return payload
+    payload = request.get_json(silent=True)
+    return payload if isinstance(payload, dict) else {}
+
+
+def payload_flag(payload: Any, key: str, default: bool = False) -> bool:
+    # JSON bodies send real booleans, multipart forms send strings.
+    value = payload.get(key, default)
+    if isinstance(value, str):
+        return value.strip().lower() in {"1", "true", "yes", "on"}
+    return bool(value)
+
+
+# libyaml's C loader/dumper are several times faster; fall back to pure Python without it.
+@functools.lru_cache(maxsize=None)
+def yaml_loader():
+    return getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+@functools.lru_cache(maxsize=None)
+def yaml_dumper():
+    return getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+
 def parse_structured_input(format_name: str, content: str) -> Any:
     fmt = format_name.lower()
     if fmt == "json":
         return json.loads(content)
     if fmt in {"yaml", "yml"}:
-        return yaml.safe_load(content)
+        return yaml.load(content, Loader=yaml_loader())
     if fmt == "xml":
         return xmltodict.parse(content)
+    if fmt == "csv":
+        return list(csv.DictReader(io.StringIO(content)))
+    if fmt == "ndjson":
+        records = []
+        for index, record, error in iter_ndjson(io.StringIO(content)):
+            if error:
+                raise ValueError(f"Line {index + 1}: {error}")
+            records.append(record)
+        return records
     raise ValueError(f"Unsupported format: {format_name}")
 
 
-def dump_structured_output(format_name: str, data: Any) -> str:
+def dump_structured_output(format_name: str, data: Any, pretty: bool = True) -> str:
     fmt = format_name.lower()
     if fmt == "json":
-        return json.dumps(data, indent=2, ensure_ascii=False)
+        return json_bytes(data, pretty=pretty).decode("utf-8")
     if fmt in {"yaml", "yml"}:
-        return yaml.safe_dump(data, sort_keys=False, allow_unicode=True)
+        return yaml.dump(data, Dumper=yaml_dumper(), sort_keys=False, allow_unicode=True)
     if fmt == "xml":
         if isinstance(data, dict) and len(data) == 1:
             return xmltodict.unparse(data, pretty=True)
         return xmltodict.unparse({"root": data}, pretty=True)
+    if fmt == "csv":
+        rows = [csv_row(item) for item in (data if isinstance(data, list) else [data])]
+        columns = list(dict.fromkeys(key for row in rows for key in row))
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=columns, restval="", lineterminator="\n")
+        writer.writeheader()
+        writer.writerows(rows)
+        return buffer.getvalue()
+    if fmt == "ndjson":
+        records = data if isinstance(data, list) else [data]
+        return "".join(json_bytes(record).decode("utf-8") + "\n" for record in records)
     raise ValueError(f"Unsupported format: {format_name}")
 
 
-def infer_json_schema(value: Any) -> dict:
+def csv_row(record: Any) -> dict:
+    # Flat CSV cells; nested values are written as compact JSON.
+    if not isinstance(record, dict):
+        record = {"value": record}
+    row = {}
+    for key, value in record.items():
+        if isinstance(value, (dict, list)):
+            value = json_bytes(value).decode("utf-8")
+        row[str(key)] = "" if value is None else value
+    return row
+
+
+def expand_records(document: Any):
+    if isinstance(document, list):
+        yield from document
+    else:
+        yield document
+
+
+def iter_xml_items(source, item_depth: int):
+    # xmltodict's item_depth mode is push-based (item_callback), so the parser runs
+    # in a helper thread and hands items over through a bounded queue.
+    items = queue.Queue(maxsize=256)
+    stop = threading.Event()
+    finished = object()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def on_item(path, item) -> bool:
+        return put(item)
+
+    def run() -> None:
+        try:
+            xmltodict.parse(source, item_depth=item_depth, item_callback=on_item)
+        except xmltodict.ParsingInterrupted:
+            pass
+        except Exception as exc:
+            put(exc)
+        finally:
+            put(finished)
+
+    worker = threading.Thread(target=run, name="xml-item-stream", daemon=True)
+    worker.start()
+    try:
+        while True:
+            item = items.get()
+            if item is finished:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        worker.join(timeout=5)
+
+
+def iter_structured_records(format_name: str, source, item_depth: int = 2):
+    # source is a binary stream. Top-level lists are expanded into records.
+    fmt = format_name.lower()
+    if fmt == "ndjson":
+        for index, record, error in iter_ndjson(io.TextIOWrapper(source, encoding="utf-8")):
+            if error:
+                raise ValueError(f"Line {index + 1}: {error}")
+            yield record
+    elif fmt == "csv":
+        yield from csv.DictReader(io.TextIOWrapper(source, encoding="utf-8", newline=""))
+    elif fmt in {"yaml", "yml"}:
+        for document in yaml.load_all(io.TextIOWrapper(source, encoding="utf-8"), Loader=yaml_loader()):
+            if document is not None:
+                yield from expand_records(document)
+    elif fmt == "xml":
+        yield from iter_xml_items(source, item_depth)
+    elif fmt == "json":
+        yield from expand_records(json.load(source))
+    else:
+        raise ValueError(f"Unsupported format: {format_name}")
+
+
+def iter_structured_output(format_name: str, records, columns: Any = None, record_tag: str = "item"):
+    fmt = format_name.lower()
+    if fmt == "ndjson":
+        for record in records:
+            yield json_bytes(record) + b"\n"
+    elif fmt == "json":
+        yield b"["
+        for index, record in enumerate(records):
+            yield (b",\n" if index else b"\n") + json_bytes(record)
+        yield b"\n]\n"
+    elif fmt in {"yaml", "yml"}:
+        for record in records:
+            text = yaml.dump(
+                record, Dumper=yaml_dumper(), sort_keys=False, allow_unicode=True, explicit_start=True
+            )
+            yield text.encode("utf-8")
+    elif fmt == "xml":
+        yield b'<?xml version="1.0" encoding="utf-8"?>\n<root>\n'
+        for record in records:
+            text = xmltodict.unparse({record_tag: record}, full_document=False, pretty=True)
+            yield text.encode("utf-8") + b"\n"
+        yield b"</root>\n"
+    elif fmt == "csv":
+        # Explicit columns select fields; a header taken from the first record cannot
+        # grow once sent, so a later record with an unknown key stops the stream.
+        buffer = io.StringIO()
+        writer = None
+        for index, record in enumerate(records):
+            row = csv_row(record)
+            if writer is None:
+                writer = csv.DictWriter(
+                    buffer, fieldnames=list(columns or row), restval="", extrasaction="ignore", lineterminator="\n"
+                )
+                writer.writeheader()
+            elif not columns:
+                unknown = [key for key in row if key not in writer.fieldnames]
+                if unknown:
+                    raise ValueError(
+                        f"Record {index} has keys not in the CSV header ({', '.join(unknown)}); pass columns."
+                    )
+            writer.writerow(row)
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    else:
+        raise ValueError(f"Unsupported format: {format_name}")
+
+
+SCHEMA_TYPE_ORDER = ("object", "array", "string", "integer", "number", "boolean", "null")
+
+
+def json_type_name(value: Any) -> str:
     if isinstance(value, dict):
-        properties = {k: infer_json_schema(v) for k, v in value.items()}
-        return {
-            "type": "object",
-            "properties": properties,
-            "required": list(value.keys()),
-            "additionalProperties": False,
-        }
+        return "object"
     if isinstance(value, list):
-        if not value:
-            return {"type": "array", "items": {}}
-        item_schemas = [infer_json_schema(item) for item in value]
-        unique = []
-        seen = set()
-        for schema in item_schemas:
-            sig = json.dumps(schema, sort_keys=True)
-            if sig not in seen:
-                seen.add(sig)
-                unique.append(schema)
-        if len(unique) == 1:
-            return {"type": "array", "items": unique[0]}
-        return {"type": "array", "items": {"anyOf": unique}}
+        return "array"
     if isinstance(value, bool):
-        return {"type": "boolean"}
+        return "boolean"
     if isinstance(value, int):
-        return {"type": "integer"}
+        return "integer"
     if isinstance(value, float):
-        return {"type": "number"}
-    if isinstance(value, str):
-        return {"type": "string"}
+        return "number"
     if value is None:
-        return {"type": "null"}
-    return {"type": "string"}
+        return "null"
+    return "string"
+
+
+def sample_items(items: list, sample_size: Any = None):
+    # Seeded random sample (in list order) so results are repeatable without the
+    # aliasing a fixed stride has on periodic data.
+    if not sample_size or len(items) <= sample_size:
+        return items
+    indexes = sorted(random.Random(len(items)).sample(range(len(items)), sample_size))
+    return (items[idx] for idx in indexes)
+
+
+# Accumulates the shape of every value added to it in a single pass: object
+# properties are unioned, required keys intersected, integer widens to number.
+class SchemaBuilder:
+    __slots__ = ("types", "properties", "required", "items")
+
+    def __init__(self):
+        self.types = set()
+        self.properties = None
+        self.required = None
+        self.items = None
+
+    def add(self, value: Any, sample_size: Any = None) -> "SchemaBuilder":
+        kind = json_type_name(value)
+        self.types.add(kind)
+        if kind == "object":
+            if self.properties is None:
+                self.properties = {}
+                self.required = set(value)
+            else:
+                self.required.intersection_update(value)
+            for key, item in value.items():
+                child = self.properties.get(key)
+                if child is None:
+                    child = self.properties[key] = SchemaBuilder()
+                child.add(item, sample_size)
+        elif kind == "array":
+            if self.items is None:
+                self.items = SchemaBuilder()
+            for item in sample_items(value, sample_size):
+                self.items.add(item, sample_size)
+        return self
+
+    def type_names(self) -> list:
+        types = set(self.types)
+        if "number" in types:
+            types.discard("integer")
+        return [name for name in SCHEMA_TYPE_ORDER if name in types]
+
+    def required_keys(self) -> list:
+        return [key for key in self.properties if key in self.required]
+
+    def to_schema(self) -> dict:
+        types = self.type_names()
+        if not types:
+            return {}
+        schemas = []
+        scalars = []
+        for name in types:
+            if name == "object":
+                schemas.append(
+                    {
+                        "type": "object",
+                        "properties": {k: child.to_schema() for k, child in self.properties.items()},
+                        "required": self.required_keys(),
+                        "additionalProperties": False,
+                    }
+                )
+            elif name == "array":
+                schemas.append({"type": "array", "items": self.items.to_schema()})
+            else:
+                scalars.append(name)
+
+        if not schemas:
+            return {"type": scalars[0] if len(scalars) == 1 else scalars}
+        if len(schemas) == 1 and scalars in ([], ["null"]):
+            schema = schemas[0]
+            if scalars:
+                schema["type"] = [schema["type"], "null"]
+            return schema
+        if scalars:
+            schemas.append({"type": scalars[0] if len(scalars) == 1 else scalars})
+        return {"anyOf": schemas}
+
+
+def infer_schema_builder(value: Any, sample_size: Any = None) -> SchemaBuilder:
+    return SchemaBuilder().add(value, sample_size)
+
+
+def infer_json_schema(value: Any, sample_size: Any = None) -> dict:
+    return infer_schema_builder(value, sample_size).to_schema()
 
 
 def _safe_identifier(name: str) -> str:
@@ -145,10 +1580,14 @@ def _class_name_from_key(key: str) -> str:
     return base
 
 
-def generate_pydantic_model(sample: Any, root_name: str = "RootModel") -> str:
+def generate_pydantic_model(sample: Any, root_name: str = "RootModel", builder: Any = None) -> str:
     class_defs = []
     used_names = set()
     needs_field_alias = False
+    typing_names = {"Any", "List"}
+    scalar_types = {"string": "str", "integer": "int", "number": "float", "boolean": "bool"}
+    if builder is None:
+        builder = infer_schema_builder(sample)
 
     def unique_class_name(base: str) -> str:
         candidate = base
@@ -159,47 +1598,58 @@ def generate_pydantic_model(sample: Any, root_name: str = "RootModel") -> str:
         used_names.add(candidate)
         return candidate
 
-    def infer_type(val: Any, key_hint: str) -> str:
+    def object_type(node: SchemaBuilder, key_hint: str) -> str:
         nonlocal needs_field_alias
-        if isinstance(val, dict):
-            class_name = unique_class_name(_class_name_from_key(key_hint))
-            fields = []
-            for raw_key, raw_value in val.items():
-                field_name = _safe_identifier(raw_key)
-                if field_name != raw_key:
-                    needs_field_alias = True
-                    fields.append(
-                        f"    {field_name}: {infer_type(raw_value, raw_key)} = Field(alias={json.dumps(raw_key)})"
-                    )
-                else:
-                    fields.append(f"    {field_name}: {infer_type(raw_value, raw_key)}")
-            if not fields:
-                fields = ["    pass"]
-            class_defs.append((class_name, fields))
-            return class_name
-        if isinstance(val, list):
-            if not val:
-                return "List[Any]"
-            non_none = [item for item in val if item is not None]
-            if not non_none:
-                return "List[Any]"
-            # Use first non-null sample item as representative element type.
-            first_type = infer_type(non_none[0], key_hint)
-            return f"List[{first_type}]"
-        if isinstance(val, bool):
-            return "bool"
-        if isinstance(val, int):
-            return "int"
-        if isinstance(val, float):
-            return "float"
-        if isinstance(val, str):
-            return "str"
-        if val is None:
+        class_name = unique_class_name(_class_name_from_key(key_hint))
+        fields = []
+        for key, child in node.properties.items():
+            # required holds the original keys; YAML keys such as 1 or true are named as strings.
+            raw_key = str(key)
+            field_name = _safe_identifier(raw_key)
+            annotation = infer_type(child, raw_key)
+            optional = key not in node.required
+            if optional and annotation != "Any" and not annotation.startswith("Optional["):
+                typing_names.add("Optional")
+                annotation = f"Optional[{annotation}]"
+            if field_name != raw_key:
+                needs_field_alias = True
+                default = "default=None, " if optional else ""
+                fields.append(
+                    f"    {field_name}: {annotation} = Field({default}alias={json.dumps(raw_key)})"
+                )
+            elif optional:
+                fields.append(f"    {field_name}: {annotation} = None")
+            else:
+                fields.append(f"    {field_name}: {annotation}")
+        if not fields:
+            fields = ["    pass"]
+        class_defs.append((class_name, fields))
+        return class_name
+
+    def infer_type(node: SchemaBuilder, key_hint: str) -> str:
+        types = node.type_names()
+        nullable = "null" in types
+        parts = []
+        for name in types:
+            if name == "object":
+                parts.append(object_type(node, key_hint))
+            elif name == "array":
+                parts.append(f"List[{infer_type(node.items, key_hint)}]")
+            elif name in scalar_types:
+                parts.append(scalar_types[name])
+        if not parts:
             return "Any"
-        return "Any"
-
-    root_type = infer_type(sample, root_name)
-    lines = ["from typing import Any, List", ""]
+        annotation = parts[0]
+        if len(parts) > 1:
+            typing_names.add("Union")
+            annotation = f"Union[{', '.join(parts)}]"
+        if nullable:
+            typing_names.add("Optional")
+            annotation = f"Optional[{annotation}]"
+        return annotation
+
+    root_type = infer_type(builder, root_name)
+    lines = [f"from typing import {', '.join(sorted(typing_names))}", ""]
     if needs_field_alias:
         lines.append("from pydantic import BaseModel, Field")
     else:
@@ -219,27 +1669,125 @@ def generate_pydantic_model(sample: Any, root_name: str = "RootModel") -> str:
     return "\n".join(lines).strip()
 
 
+@app.get("/api/cache/stats")
+def cache_stats():
+    result = cache_stats_snapshot()
+    result["template_library"] = TEMPLATE_LIBRARY.stats()
+    result["engine_workers"] = ENGINE_POOL.stats()
+    result["regex_workers"] = REGEX_POOL.stats()
+    result["batch_workers"] = BATCH_POOL.stats()
+    if PLAYGROUND_BROKER is not None:
+        result["playground_sessions"] = PLAYGROUND_BROKER.stats()
+    return jsonify({"ok": True, "result": result})
+
+
+@app.get("/api/templates")
+def template_library_index():
+    result = {kind: TEMPLATE_LIBRARY.names(kind) for kind in TEMPLATE_EXTENSIONS}
+    result["textfsm_index"] = os.path.isfile(os.path.join(TEMPLATE_LIBRARY.dirs["textfsm"], "index"))
+    return jsonify({"ok": True, "result": result})
+
+
+def collect_runtime_metrics() -> list:
+    # Compiles run in the worker pools, so their counters come from the workers.
+    caches = [({"cache": name}, stats) for name, stats in cache_stats_snapshot().items()]
+    pools = [({"pool": pool.name}, pool.stats()) for pool in (ENGINE_POOL, REGEX_POOL, BATCH_POOL)]
+    cache_metrics = [
+        ("cache_hits_total", "counter", "Cache hits.", "hits"),
+        ("cache_misses_total", "counter", "Cache misses.", "misses"),
+        ("cache_evictions_total", "counter", "Cache evictions.", "evictions"),
+        ("cache_hit_ratio", "gauge", "Cache hits divided by lookups.", "hit_ratio"),
+        ("cache_entries", "gauge", "Entries held per cache.", "size"),
+    ]
+    pool_metrics = [
+        ("worker_pool_in_flight", "gauge", "Jobs running in the worker pool.", "in_flight"),
+        ("worker_pool_queued", "gauge", "Callers waiting for a worker.", "queued"),
+        ("worker_pool_rejected_total", "counter", "Calls rejected because the pool was saturated.", "rejected"),
+        ("worker_pool_timeouts_total", "counter", "Jobs killed after their timeout.", "timeouts"),
+    ]
+    return [
+        (name, metric_type, documentation, [(labels, stats[key]) for labels, stats in source])
+        for source, definitions in ((caches, cache_metrics), (pools, pool_metrics))
+        for name, metric_type, documentation, key in definitions
+    ]
+
+
+metrics.REGISTRY.register_collector(collect_runtime_metrics)
+
+
+def textfsm_job(template: str, raw_text: str) -> dict:
+    compiled, cached = get_textfsm_template(template)
+    rows = compiled.parse(raw_text)
+    records = [dict(zip(compiled.header, row)) for row in rows]
+    return {"headers": compiled.header, "rows": rows, "records": records, "cached": cached}
+
+
 @app.post("/api/textfsm")
+@cache_response
 def textfsm_parser():
-    payload = request.get_json(silent=True) or {}
-    template = payload.get("template", "")
+    payload = request_payload("text")
     raw_text = payload.get("text", "")
 
+    try:
+        template, template_name = payload_template("textfsm", payload)
+    except (OSError, ValueError) as exc:
+        return error_response(str(exc))
     if not template.strip() or not raw_text.strip():
         return error_response("Template and text are required.")
 
     try:
-        parser = textfsm.TextFSM(io.StringIO(template))
-        rows = parser.ParseText(raw_text)
-        records = [dict(zip(parser.header, row)) for row in rows]
-        return jsonify({"ok": True, "headers": parser.header, "rows": rows, "records": records})
+        result = run_engine_job(textfsm_job, template, raw_text)
+        if template_name:
+            result["template_name"] = template_name
+        return jsonify({"ok": True, **result})
     except Exception as exc:
+        return engine_error_response(exc)
+
+
+@app.post("/api/textfsm/batch")
+def textfsm_batch_parser():
+    payload = request.get_json(silent=True) or {}
+
+    try:
+        template, _ = payload_template("textfsm", payload)
+    except (OSError, ValueError) as exc:
         return error_response(str(exc))
+    if not template.strip():
+        return error_response("Template is required.")
+
+    try:
+        items = normalize_batch_inputs(payload.get("outputs"))
+        compiled, cached = get_textfsm_template(template)
+    except Exception as exc:
+        return error_response(str(exc))
+
+    try:
+        results = iter_batch(
+            textfsm_batch_item,
+            [(name, (template, text)) for name, text in items],
+            workers=payload.get("workers"),
+            processes=bool(payload.get("processes", False)),
+        )
+    except PoolSaturated as exc:
+        return engine_error_response(exc)
+    return batch_response(
+        results,
+        [name for name, _ in items],
+        extra={"headers": compiled.header, "cached": cached},
+        stream=bool(payload.get("stream", False)),
+    )
+
+
+def xpath_job(xml_text: str, expression: str) -> tuple:
+    root = etree.fromstring(xml_text.encode("utf-8"))
+    compiled, cached = get_xpath(expression)
+    return format_xpath_matches(compiled(root)), cached
 
 
 @app.post("/api/xpath")
+@cache_response
 def xpath_tester():
-    payload = request.get_json(silent=True) or {}
+    payload = request_payload("xml")
     xml_text = payload.get("xml", "")
     expression = payload.get("xpath", "")
 
@@ -247,18 +1795,193 @@ def xpath_tester():
         return error_response("XML and XPath expression are required.")
 
     try:
-        root = etree.fromstring(xml_text.encode("utf-8"))
-        matches = root.xpath(expression)
-        output = []
-        for item in matches:
-            if isinstance(item, etree._Element):
-                output.append(etree.tostring(item, encoding="unicode", pretty_print=True).strip())
+        output, cached = run_engine_job(xpath_job, xml_text, expression)
+        return jsonify({"ok": True, "count": len(output), "results": output, "cached": cached})
+    except Exception as exc:
+        return engine_error_response(exc)
+
+
+@app.post("/api/xpath/multi")
+def xpath_multi_tester():
+    # Parses the document once (or reuses a stored document_id) and evaluates
+    # every expression against it.
+    payload = request.get_json(silent=True) or {}
+    xml_text = payload.get("xml", "")
+    document_id = payload.get("document_id", "")
+    raw_expressions = payload.get("expressions")
+    namespaces = payload.get("namespaces") or None
+
+    if isinstance(raw_expressions, list):
+        expressions = [(str(expr), expr) for expr in raw_expressions]
+    elif isinstance(raw_expressions, dict):
+        expressions = [(str(name), expr) for name, expr in raw_expressions.items()]
+    else:
+        return error_response("expressions must be a list or an object of named XPath expressions.")
+    if not expressions:
+        return error_response("At least one XPath expression is required.")
+    if not document_id and not xml_text.strip():
+        return error_response("XML or document_id is required.")
+    if namespaces is not None and not isinstance(namespaces, dict):
+        return error_response("namespaces must be an object of prefix to URI.")
+
+    try:
+        if document_id:
+            root = XPATH_DOCUMENTS.get(document_id)
+            if root is None:
+                return error_response("Document not found or expired. Upload the XML again.", 404)
+        else:
+            root = etree.fromstring(xml_text.encode("utf-8"))
+
+        response = {"ok": True}
+        if not document_id and payload.get("keep"):
+            if WEB_PROCESSES > 1:
+                return error_response(
+                    f"keep needs a single web worker (WEB_WORKERS=1); {WEB_PROCESSES} workers do not share "
+                    "stored documents."
+                )
+            ttl = float(payload.get("ttl") or XPATH_DOCUMENTS.ttl)
+            ttl = max(1.0, min(ttl, XPATH_DOCUMENT_MAX_TTL))
+            document_id = str(uuid.uuid4())
+            XPATH_DOCUMENTS.put(document_id, root, ttl)
+            response["ttl"] = ttl
+        if document_id:
+            response["document_id"] = document_id
+
+        results = {}
+        for name, expression in expressions:
+            try:
+                if not isinstance(expression, str) or not expression.strip():
+                    raise ValueError("XPath expression must be a non-empty string.")
+                compiled, cached = get_xpath(expression, namespaces)
+                output = format_xpath_matches(compiled(root))
+                results[name] = {"ok": True, "count": len(output), "results": output, "cached": cached}
+            except Exception as exc:
+                results[name] = {"ok": False, "error": str(exc)}
+        response["results"] = results
+        return jsonify(response)
+    except Exception as exc:
+        return error_response(str(exc))
+
+
+def parse_tag_path(path_text: str):
+    # "interfaces/interface" matches at any depth, "/rpc-reply/data/x" is anchored
+    # at the root; segments are local names (namespaces ignored) and may be "*".
+    text = path_text.strip()
+    anchored = text.startswith("/") and not text.startswith("//")
+    segments = [seg for seg in text.strip("/").split("/") if seg]
+    if not segments or any(seg in {".", ".."} or "[" in seg for seg in segments):
+        raise ValueError("Path must be a simple element path such as interfaces/interface.")
+    return anchored, segments
+
+
+def tag_path_matches(stack: list, anchored: bool, segments: list) -> bool:
+    if len(stack) < len(segments) or anchored and len(stack) != len(segments):
+        return False
+    tail = stack[-len(segments):]
+    return all(seg == "*" or seg == name for seg, name in zip(segments, tail))
+
+
+def iter_xml_matches(source, path_text: str, expression: str = "", namespaces: Any = None):
+    # Memory stays bounded by the largest matched subtree: finished elements outside
+    # an open match are cleared and detached from their parent as soon as they end.
+    anchored, segments = parse_tag_path(path_text)
+    compiled = get_xpath(expression, namespaces)[0] if expression.strip() else None
+    stack = []
+    open_match = None
+    # Entities are never resolved and no DTD is loaded, so huge_tree only lifts the
+    # size limits for large replies and cannot be used for XXE or entity expansion.
+    events = etree.iterparse(
+        source, events=("start", "end"), resolve_entities=False, load_dtd=False, no_network=True, huge_tree=True
+    )
+    for event, elem in events:
+        if event == "start":
+            stack.append(etree.QName(elem).localname)
+            if open_match is None and tag_path_matches(stack, anchored, segments):
+                open_match = elem
+            continue
+
+        path = "/" + "/".join(stack)
+        stack.pop()
+        if open_match is not None and elem is not open_match:
+            continue
+        if elem is open_match:
+            open_match = None
+            if compiled is None:
+                yield path, elem, None
             else:
-                output.append(str(item))
-        return jsonify({"ok": True, "count": len(matches), "results": output})
+                values = format_xpath_matches(compiled(elem))
+                if values:
+                    yield path, elem, values
+        elem.clear(keep_tail=False)
+        parent = elem.getparent()
+        if parent is not None:
+            while elem.getprevious() is not None:
+                del parent[0]
+
+
+@app.post("/api/xpath/stream")
+def xpath_stream_tester():
+    # Raw XML body (path/xpath as query args), multipart "xml" upload, or JSON with "xml".
+    if request.files:
+        options = request.form
+        upload = request.files.get("xml")
+        source = upload.stream if upload else None
+    elif request.is_json:
+        options = request.get_json(silent=True) or {}
+        xml_text = options.get("xml", "")
+        source = io.BytesIO(xml_text.encode("utf-8")) if xml_text.strip() else None
+    else:
+        options = request.args
+        source = request.stream
+    path_text = options.get("path", "")
+    expression = options.get("xpath", "")
+    output = options.get("output", "xml")
+    namespaces = options.get("namespaces") or None
+
+    if source is None:
+        return error_response("XML input is required.")
+    if not path_text.strip():
+        return error_response("A tag path to select is required.")
+    if output not in {"xml", "dict"}:
+        return error_response("output must be xml or dict.")
+    try:
+        if isinstance(namespaces, str):
+            namespaces = json.loads(namespaces)
+        max_matches = int(options.get("max_matches") or 0)
+        parse_tag_path(path_text)
+        if expression.strip():
+            get_xpath(expression, namespaces)
     except Exception as exc:
         return error_response(str(exc))
 
+    def lines():
+        count = 0
+        start = time.perf_counter()
+        try:
+            for path, elem, values in iter_xml_matches(source, path_text, expression, namespaces):
+                count += 1
+                line = {"index": count - 1, "path": path}
+                if values is not None:
+                    line["results"] = values
+                elif output == "dict":
+                    line["result"] = xmltodict.parse(etree.tostring(elem))
+                else:
+                    line["result"] = etree.tostring(elem, encoding="unicode").strip()
+                yield line
+                if max_matches and count >= max_matches:
+                    break
+        except Exception as exc:
+            yield {"ok": False, "error": str(exc)}
+        yield {"done": True, "count": count, "elapsed_ms": round((time.perf_counter() - start) * 1000, 3)}
+
+    return ndjson_response(lines())
+
+
+@app.delete("/api/xpath/documents/<document_id>")
+def xpath_document_release(document_id: str):
+    released = XPATH_DOCUMENTS.pop(document_id) is not None
+    return jsonify({"ok": True, "released": released})
+
 
 @app.post("/api/json-schema")
 def json_schema_validator():
@@ -270,17 +1993,74 @@ def json_schema_validator():
         return error_response("Schema and data are required.")
 
     try:
-        schema = json.loads(schema_text)
-        data = json.loads(data_text)
-        validate(instance=data, schema=schema)
+        with phase("parse"):
+            schema = json.loads(schema_text)
+            data = json.loads(data_text)
+        with phase("engine"):
+            validator, _ = get_schema_validator(schema, payload_flag(payload, "format_check"))
+            validate_instance(validator, data)
         return jsonify({"ok": True, "valid": True, "message": "Valid JSON for provided schema."})
-    except ValidationError as exc:
+    except jsonschema.ValidationError as exc:
         return jsonify({"ok": True, "valid": False, "message": exc.message, "path": list(exc.path)})
     except Exception as exc:
         return error_response(str(exc))
 
 
+@app.post("/api/json-schema/bulk")
+def json_schema_bulk_validator():
+    # JSON body with "data" (array text or list) or multipart with an "instances" upload.
+    if request.files:
+        payload = request.form
+        upload = request.files.get("instances")
+        source = upload.stream if upload else None
+    else:
+        payload = request.get_json(silent=True) or {}
+        source = payload.get("data")
+    schema_raw = payload.get("schema", "")
+    data_format = payload.get("data_format", "json")
+    format_check = payload_flag(payload, "format_check")
+
+    if not source or isinstance(source, str) and not source.strip():
+        return error_response("Instances are required.")
+    try:
+        schema = json.loads(schema_raw) if isinstance(schema_raw, str) else schema_raw
+        if schema in ("", None):
+            return error_response("Schema is required.")
+        max_errors = int(payload.get("max_errors") or 0)
+        validator, cached = get_schema_validator(schema, format_check)
+    except Exception as exc:
+        return error_response(str(exc))
+
+    def results():
+        try:
+            for index, instance, parse_error in iter_json_records(source, data_format):
+                if parse_error:
+                    yield str(index), {"ok": False, "error": parse_error}
+                    continue
+                start = time.perf_counter()
+                errors = []
+                for error in validator.iter_errors(instance):
+                    errors.append(describe_validation_error(error))
+                    if max_errors and len(errors) >= max_errors:
+                        break
+                yield str(index), {
+                    "ok": True,
+                    "valid": not errors,
+                    "errors": errors,
+                    "elapsed_ms": round((time.perf_counter() - start) * 1000, 3),
+                }
+        except Exception as exc:
+            yield "input", {"ok": False, "error": str(exc)}
+
+    if payload_flag(payload, "stream"):
+        return batch_response(results(), [], {"cached": cached}, stream=True)
+    outcomes = list(results())
+    invalid = sum(1 for _, outcome in outcomes if outcome.get("ok") and not outcome["valid"])
+    return batch_response(outcomes, [name for name, _ in outcomes], {"cached": cached, "invalid": invalid})
+
+
 @app.post("/api/jmespath")
+@cache_response
 def jmespath_validator():
     payload = request.get_json(silent=True) or {}
     data_text = payload.get("data", "")
@@ -290,16 +2070,92 @@ def jmespath_validator():
         return error_response("JSON data and JMESPath expression are required.")
 
     try:
-        data = json.loads(data_text)
-        result = jmespath.search(expression, data)
-        return jsonify({"ok": True, "result": result})
+        with phase("parse"):
+            data = json.loads(data_text)
+        with phase("engine"):
+            compiled, cached = get_jmespath(expression)
+            result = compiled.search(data)
+        return jsonify({"ok": True, "result": result, "cached": cached})
     except Exception as exc:
         return error_response(str(exc))
 
 
+@app.post("/api/jmespath/bulk")
+def jmespath_bulk_query():
+    # Applies one or more expressions to every record of a JSON array or NDJSON
+    # input (text in "data", or a multipart "data" upload read line by line).
+    if request.files:
+        payload = request.form
+        upload = request.files.get("data")
+        source = upload.stream if upload else None
+        raw_expressions = payload.getlist("expressions") or payload.get("expression", "")
+    else:
+        payload = request.get_json(silent=True) or {}
+        source = payload.get("data")
+        raw_expressions = payload.get("expressions") or payload.get("expression", "")
+    data_format = payload.get("data_format", "ndjson")
+
+    if isinstance(raw_expressions, str):
+        expressions = [("result", raw_expressions)] if raw_expressions.strip() else []
+    elif isinstance(raw_expressions, list):
+        expressions = [(str(expr), expr) for expr in raw_expressions]
+    elif isinstance(raw_expressions, dict):
+        expressions = [(str(name), expr) for name, expr in raw_expressions.items()]
+    else:
+        expressions = []
+    if not expressions:
+        return error_response("At least one JMESPath expression is required.")
+    if not source or isinstance(source, str) and not source.strip():
+        return error_response("JSON or NDJSON data is required.")
+
+    try:
+        compiled = [(name, get_jmespath(expr)[0]) for name, expr in expressions]
+    except Exception as exc:
+        return error_response(str(exc))
+    skip_null = payload_flag(payload, "skip_null")
+
+    def results():
+        try:
+            for index, record, parse_error in iter_json_records(source, data_format):
+                if parse_error:
+                    yield str(index), {"ok": False, "error": parse_error}
+                    continue
+                try:
+                    values = {name: expr.search(record) for name, expr in compiled}
+                except Exception as exc:
+                    yield str(index), {"ok": False, "error": str(exc)}
+                    continue
+                if skip_null and all(value is None for value in values.values()):
+                    continue
+                yield str(index), {"ok": True, "results": values}
+        except Exception as exc:
+            yield "input", {"ok": False, "error": str(exc)}
+
+    if payload_flag(payload, "stream"):
+        return batch_response(results(), [], stream=True)
+    outcomes = list(results())
+    return batch_response(outcomes, [name for name, _ in outcomes])
+
+
+CONVERT_MIMETYPES = {
+    "json": "application/json",
+    "yaml": "application/yaml",
+    "yml": "application/yaml",
+    "xml": "application/xml",
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def convert_job(source_format: str, target_format: str, content: str, pretty: bool) -> str:
+    parsed = parse_structured_input(source_format, content)
+    return dump_structured_output(target_format, parsed, pretty=pretty)
+
+
 @app.post("/api/convert")
+@cache_response
 def converter():
-    payload = request.get_json(silent=True) or {}
+    payload = request_payload("content")
     source_format = payload.get("source_format", "")
     target_format = payload.get("target_format", "")
     content = payload.get("content", "")
@@ -310,14 +2166,114 @@ def converter():
         return error_response("Content is required.")
 
     try:
-        parsed = parse_structured_input(source_format, content)
-        output = dump_structured_output(target_format, parsed)
+        output = run_engine_job(
+            convert_job, source_format, target_format, content, payload_flag(payload, "pretty", True)
+        )
+        if payload_flag(payload, "raw"):
+            # Return the converted document as-is instead of JSON-encoding it again.
+            return Response(output, mimetype=CONVERT_MIMETYPES.get(target_format.lower(), "text/plain"))
         return jsonify({"ok": True, "result": output})
+    except Exception as exc:
+        return engine_error_response(exc)
+
+
+@app.post("/api/convert/stream")
+def stream_converter():
+    # Record-by-record conversion for large inputs: raw body (options as query args),
+    # multipart "content" upload, or JSON with "content" text.
+    if request.files:
+        options = request.form
+        upload = request.files.get("content")
+        source = upload.stream if upload else None
+    elif request.is_json:
+        options = request.get_json(silent=True) or {}
+        content = options.get("content", "")
+        source = io.BytesIO(content.encode("utf-8")) if content.strip() else None
+    else:
+        options = request.args
+        source = request.stream
+    source_format = str(options.get("source_format", "")).lower()
+    target_format = str(options.get("target_format", "")).lower()
+    columns = options.get("columns") or None
+    record_tag = options.get("record_tag") or "item"
+
+    if not source_format or not target_format:
+        return error_response("Source and target format are required.")
+    if target_format not in CONVERT_MIMETYPES:
+        return error_response(f"Unsupported format: {target_format}")
+    if source is None:
+        return error_response("Content is required.")
+    if isinstance(columns, str):
+        columns = [col.strip() for col in columns.split(",") if col.strip()]
+
+    try:
+        item_depth = int(options.get("item_depth") or 2)
+        records = iter_structured_records(source_format, source, item_depth)
+        # Pull the first record now so malformed input still gets a 400.
+        first = next(records, None)
     except Exception as exc:
         return error_response(str(exc))
+    if first is None:
+        return error_response("No records found in content.")
+
+    def generate():
+        try:
+            yield from iter_structured_output(
+                target_format, itertools.chain([first], records), columns, record_tag
+            )
+        except Exception as exc:
+            # Headers are already sent; end the stream with a visible error marker.
+            if target_format == "ndjson":
+                yield json_bytes({"ok": False, "error": str(exc)}) + b"\n"
+            else:
+                yield f"\n# conversion error: {exc}\n".encode("utf-8")
+        finally:
+            records.close()
+
+    return Response(stream_with_context(generate()), mimetype=CONVERT_MIMETYPES[target_format])
+
+
+def data_model_job(
+    sample_format: str,
+    model_type: str,
+    sample_data_text: str,
+    validate_format: str,
+    validate_data_text: str,
+    sample_size: Any,
+) -> dict:
+    sample_data = parse_structured_input(sample_format, sample_data_text)
+    builder = infer_schema_builder(sample_data, sample_size)
+    schema = builder.to_schema()
+
+    if model_type == "json_schema":
+        generated_model = dump_structured_output("json", schema)
+    else:
+        generated_model = generate_pydantic_model(sample_data, builder=builder)
+
+    target_data = sample_data
+    if validate_data_text.strip():
+        target_data = parse_structured_input(validate_format, validate_data_text)
+
+    try:
+        validator, _ = get_schema_validator(schema)
+        validate_instance(validator, target_data)
+        validation_result = {"valid": True, "message": "Validation passed."}
+    except jsonschema.ValidationError as exc:
+        validation_result = {
+            "valid": False,
+            "message": exc.message,
+            "path": list(exc.path),
+        }
+
+    return {
+        "model_type": model_type,
+        "generated_model": generated_model,
+        "validation": validation_result,
+    }
 
 
 @app.post("/api/data-model")
+@cache_response
 def data_model_workbench():
     payload = request.get_json(silent=True) or {}
     sample_format = payload.get("sample_format", "json")
@@ -328,117 +2284,789 @@ def data_model_workbench():
 
     if not sample_data_text.strip():
         return error_response("Sample data is required.")
+    if model_type not in ("json_schema", "pydantic"):
+        return error_response("model_type must be json_schema or pydantic.")
 
     try:
-        sample_data = parse_structured_input(sample_format, sample_data_text)
-        schema = infer_json_schema(sample_data)
-
-        if model_type == "json_schema":
-            generated_model = json.dumps(schema, indent=2, ensure_ascii=False)
-        elif model_type == "pydantic":
-            generated_model = generate_pydantic_model(sample_data)
-        else:
-            return error_response("model_type must be json_schema or pydantic.")
-
-        target_data = sample_data
-        if validate_data_text.strip():
-            target_data = parse_structured_input(validate_format, validate_data_text)
-
-        try:
-            validate(instance=target_data, schema=schema)
-            validation_result = {"valid": True, "message": "Validation passed."}
-        except ValidationError as exc:
-            validation_result = {
-                "valid": False,
-                "message": exc.message,
-                "path": list(exc.path),
-            }
-
-        return jsonify(
-            {
-                "ok": True,
-                "result": {
-                    "model_type": model_type,
-                    "generated_model": generated_model,
-                    "validation": validation_result,
-                },
-            }
+        sample_size = int(payload.get("sample_size") or 0) or None
+        result = run_engine_job(
+            data_model_job,
+            sample_format,
+            model_type,
+            sample_data_text,
+            validate_format,
+            validate_data_text,
+            sample_size,
         )
+        return jsonify({"ok": True, "result": result})
     except Exception as exc:
-        return error_response(str(exc))
+        return engine_error_response(exc)
 
 
 @app.post("/api/jinja2")
+@cache_response
 def jinja2_renderer():
     payload = request.get_json(silent=True) or {}
-    template_text = payload.get("template", "")
     vars_text = payload.get("variables", "{}")
     vars_format = payload.get("variables_format", "json")
 
+    try:
+        template_text, _ = payload_template("jinja2", payload)
+    except (OSError, ValueError) as exc:
+        return error_response(str(exc))
     if not template_text.strip():
         return error_response("Template is required.")
 
     try:
-        variables = parse_structured_input(vars_format, vars_text)
+        with phase("parse"):
+            variables = parse_structured_input(vars_format, vars_text)
         if variables is None:
             variables = {}
-        env = Environment(undefined=StrictUndefined, trim_blocks=True, lstrip_blocks=True)
-        template = env.from_string(template_text)
-        rendered = template.render(**variables)
-        return jsonify({"ok": True, "result": rendered})
+        with phase("engine"):
+            template, cached = get_jinja_template(template_text)
+            rendered = template.render(**variables)
+        return jsonify({"ok": True, "result": rendered, "cached": cached})
     except Exception as exc:
         return error_response(str(exc))
 
 
-@app.post("/api/ttp")
-def ttp_parser():
+def jinja2_batch_item(template_text: str, raw_vars: Any, vars_format: str) -> dict:
+    try:
+        if isinstance(raw_vars, str):
+            variables = parse_structured_input(vars_format, raw_vars) if raw_vars.strip() else None
+        else:
+            variables = raw_vars
+        if variables is None:
+            variables = {}
+        if not isinstance(variables, dict):
+            raise ValueError("Variables must be a mapping.")
+        template, _ = get_jinja_template(template_text)
+        return {"ok": True, "result": template.render(**variables)}
+    except Exception as exc:
+        return {"ok": False, "error": str(exc)}
+
+
+@app.post("/api/jinja2/batch")
+def jinja2_batch_renderer():
     payload = request.get_json(silent=True) or {}
+    vars_format = payload.get("variables_format", "json")
+
+    try:
+        template_text, _ = payload_template("jinja2", payload)
+    except (OSError, ValueError) as exc:
+        return error_response(str(exc))
+    if not template_text.strip():
+        return error_response("Template is required.")
+
+    try:
+        items = normalize_batch_inputs(payload.get("variable_sets"), "variables", text_only=False)
+        _, cached = get_jinja_template(template_text)
+    except Exception as exc:
+        return error_response(str(exc))
+
+    try:
+        results = iter_batch(
+            jinja2_batch_item,
+            [(name, (template_text, raw_vars, vars_format)) for name, raw_vars in items],
+            workers=payload.get("workers"),
+            processes=bool(payload.get("processes", False)),
+        )
+    except PoolSaturated as exc:
+        return engine_error_response(exc)
+    return batch_response(
+        results,
+        [name for name, _ in items],
+        extra={"cached": cached},
+        stream=bool(payload.get("stream", False)),
+    )
+
+
+HOST_VARS_FORMATS = {".json": "json", ".yml": "yaml", ".yaml": "yaml"}
+
+
+def group_host_vars_sources(entries: list, strip_root: bool = False) -> list:
+    # entries are (relative posix path, loader) pairs. A file at the top level is one
+    # host named after its stem; files under a top-level directory (host_vars/r1/*.yml)
+    # are merged into the host named after that directory.
+    usable = []
+    for rel_path, loader in entries:
+        parts = PurePosixPath(rel_path).parts
+        suffix = PurePosixPath(rel_path).suffix.lower()
+        if not parts or suffix not in HOST_VARS_FORMATS or any(p.startswith(".") for p in parts):
+            continue
+        usable.append((parts, HOST_VARS_FORMATS[suffix], loader))
+
+    # Archives usually wrap everything in one folder such as host_vars/; drop it.
+    if strip_root and usable and all(len(parts) > 1 for parts, _, _ in usable):
+        if len({parts[0] for parts, _, _ in usable}) == 1:
+            usable = [(parts[1:], fmt, loader) for parts, fmt, loader in usable]
+
+    hosts = collections.OrderedDict()
+    for parts, fmt, loader in sorted(usable, key=lambda item: item[0]):
+        host = parts[0] if len(parts) > 1 else PurePosixPath(parts[0]).stem
+        hosts.setdefault(host, []).append((fmt, loader))
+    return list(hosts.items())
+
+
+# Server-side fleet paths are resolved inside these roots; unset disables vars_dir/output_dir.
+FLEET_VARS_ROOT = os.environ.get("FLEET_VARS_ROOT", "")
+FLEET_OUTPUT_ROOT = os.environ.get("FLEET_OUTPUT_ROOT", "")
+
+
+def confined_path(root: str, env_name: str, value: str) -> str:
+    if not root:
+        raise ValueError(f"Server paths are disabled; set {env_name} to allow them.")
+    base = os.path.realpath(root)
+    path = os.path.realpath(os.path.join(base, value))
+    if path != base and not path.startswith(base + os.sep):
+        raise ValueError(f"Path must be inside {env_name}: {value}")
+    return path
+
+
+def host_vars_from_dir(vars_dir: str) -> list:
+    entries = []
+    base = os.path.realpath(vars_dir)
+    for dirpath, dirnames, filenames in os.walk(vars_dir):
+        dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+        for filename in filenames:
+            full_path = os.path.join(dirpath, filename)
+            if not os.path.realpath(full_path).startswith(base + os.sep):
+                continue  # symlink pointing out of the vars root
+            rel_path = PurePosixPath(*os.path.relpath(full_path, vars_dir).split(os.sep))
+            entries.append(
+                (str(rel_path), functools.partial(_read_text_file, full_path))
+            )
+    return group_host_vars_sources(entries)
+
+
+def _read_text_file(path: str) -> str:
+    with open(path, encoding="utf-8") as handle:
+        return handle.read()
+
+
+@contextlib.contextmanager
+def host_vars_from_archive(stream):
+    if zipfile.is_zipfile(stream):
+        stream.seek(0)
+        with zipfile.ZipFile(stream) as archive:
+            entries = [
+                (info.filename, functools.partial(_read_zip_member, archive, info))
+                for info in archive.infolist()
+                if not info.is_dir()
+            ]
+            yield group_host_vars_sources(entries, strip_root=True)
+        return
+
+    stream.seek(0)
+    with tarfile.open(fileobj=stream, mode="r:*") as archive:
+        entries = [
+            (member.name, functools.partial(_read_tar_member, archive, member))
+            for member in archive.getmembers()
+            if member.isfile()
+        ]
+        yield group_host_vars_sources(entries, strip_root=True)
+
+
+def is_supported_archive(stream) -> bool:
+    try:
+        if zipfile.is_zipfile(stream):
+            return True
+        stream.seek(0)
+        return tarfile.is_tarfile(stream)
+    finally:
+        stream.seek(0)
+
+
+def _read_zip_member(archive, info) -> str:
+    return archive.read(info).decode("utf-8")
+
+
+def _read_tar_member(archive, member) -> str:
+    return archive.extractfile(member).read().decode("utf-8")
+
+
+def load_host_vars(sources: list) -> dict:
+    variables = {}
+    for fmt, loader in sources:
+        data = parse_structured_input(fmt, loader())
+        if data is None:
+            continue
+        if not isinstance(data, dict):
+            raise ValueError("Host variables must be a mapping.")
+        variables.update(data)
+    return variables
+
+
+def render_host_config(template, variables: dict, output_path: Any = None):
+    # Streams Template.generate() chunks either to output_path (written atomically)
+    # or back to the caller; yields encoded chunks and never joins the whole config.
+    if output_path is None:
+        for chunk in template.generate(**variables):
+            yield chunk.encode("utf-8")
+        return
+
+    tmp_path = f"{output_path}.tmp"
+    try:
+        with open(tmp_path, "wb") as handle:
+            for chunk in template.generate(**variables):
+                data = chunk.encode("utf-8")
+                handle.write(data)
+                yield data
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def iter_fleet_render(template, hosts: list, output_dir: str, output_format: str):
+    total = errors = 0
+    fleet_start = time.perf_counter()
+    for host, sources in hosts:
+        total += 1
+        start = time.perf_counter()
+        size = 0
+        output_path = None
+        if output_dir:
+            output_path = os.path.join(output_dir, re.sub(r"[^\w.-]", "_", host) + ".cfg")
+        try:
+            variables = load_host_vars(sources)
+            if output_format == "text" and not output_dir:
+                yield f"! ===== {host} =====\n".encode("utf-8")
+                for data in render_host_config(template, variables):
+                    size += len(data)
+                    yield data
+                elapsed = round((time.perf_counter() - start) * 1000, 3)
+                yield f"\n! ===== {host}: {size} bytes in {elapsed} ms =====\n".encode("utf-8")
+                continue
+
+            chunks = []
+            for data in render_host_config(template, variables, output_path):
+                size += len(data)
+                if output_path is None:
+                    chunks.append(data)
+            line = {
+                "host": host,
+                "ok": True,
+                "bytes": size,
+                "render_ms": round((time.perf_counter() - start) * 1000, 3),
+            }
+            if output_path is None:
+                line["config"] = b"".join(chunks).decode("utf-8")
+            else:
+                line["path"] = output_path
+        except Exception as exc:
+            errors += 1
+            line = {"host": host, "ok": False, "error": str(exc)}
+            if output_format == "text" and not output_dir:
+                yield f"\n! ===== {host}: error: {exc} =====\n".encode("utf-8")
+                continue
+        yield json_bytes(line) + b"\n"
+
+    summary = {
+        "done": True,
+        "count": total,
+        "errors": errors,
+        "total_ms": round((time.perf_counter() - fleet_start) * 1000, 3),
+    }
+    if output_format == "text" and not output_dir:
+        yield f"! ===== done: {total} hosts, {errors} errors =====\n".encode("utf-8")
+    else:
+        yield json_bytes(summary) + b"\n"
+
+
+@app.post("/api/jinja2/fleet")
+def jinja2_fleet_renderer():
+    # JSON body with vars_dir, or multipart form with an "archive" upload (zip/tar).
+    if request.files:
+        payload = request.form
+        archive = request.files.get("archive")
+    else:
+        payload = request.get_json(silent=True) or {}
+        archive = None
     template_text = payload.get("template", "")
+    vars_dir = payload.get("vars_dir", "")
+    output_dir = payload.get("output_dir", "")
+    output_format = payload.get("format", "ndjson")
+
+    if not template_text.strip():
+        return error_response("Template is required.")
+    if bool(vars_dir) == bool(archive):
+        return error_response("Provide either vars_dir or an archive upload.")
+    if output_format not in {"ndjson", "text"}:
+        return error_response("format must be ndjson or text.")
+    try:
+        if vars_dir:
+            vars_dir = confined_path(FLEET_VARS_ROOT, "FLEET_VARS_ROOT", vars_dir)
+        if output_dir:
+            output_dir = confined_path(FLEET_OUTPUT_ROOT, "FLEET_OUTPUT_ROOT", output_dir)
+    except ValueError as exc:
+        return error_response(str(exc))
+    if vars_dir and not os.path.isdir(vars_dir):
+        return error_response(f"Variables directory not found: {vars_dir}")
+    if archive is not None and not is_supported_archive(archive.stream):
+        return error_response("Archive must be a zip or tar file.")
+
+    try:
+        template, _ = get_jinja_template(template_text)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+    except Exception as exc:
+        return error_response(str(exc))
+
+    def generate():
+        if archive is not None:
+            with host_vars_from_archive(archive.stream) as hosts:
+                yield from iter_fleet_render(template, hosts, output_dir, output_format)
+        else:
+            yield from iter_fleet_render(template, host_vars_from_dir(vars_dir), output_dir, output_format)
+
+    mimetype = "text/plain" if output_format == "text" and not output_dir else "application/x-ndjson"
+    return Response(stream_with_context(generate()), mimetype=mimetype)
+
+
+def ttp_job(template_text: str, data_text: str) -> tuple:
+    compiled, cached = get_ttp_template(template_text)
+    return compiled.parse([data_text]), cached
+
+
+@app.post("/api/ttp")
+@cache_response
+def ttp_parser():
+    payload = request_payload("data")
     data_text = payload.get("data", "")
 
+    try:
+        template_text, _ = payload_template("ttp", payload)
+    except (OSError, ValueError) as exc:
+        return error_response(str(exc))
     if not template_text.strip() or not data_text.strip():
         return error_response("TTP template and data are required.")
 
     try:
-        parser = ttp(data=data_text, template=template_text)
-        parser.parse()
-        result_json = parser.result(format="json")
-        parsed_result = [json.loads(item) for item in result_json]
-        return jsonify({"ok": True, "result": parsed_result})
+        parsed_result, cached = run_engine_job(ttp_job, template_text, data_text)
+        return jsonify({"ok": True, "result": parsed_result, "cached": cached})
     except Exception as exc:
-        return error_response(str(exc))
+        return engine_error_response(exc)
 
 
-@app.post("/api/python-playground")
-@app.post("/api/function-tester")
-def python_playground():
+def ttp_batch_item(template_text: str, data_text: str) -> dict:
+    try:
+        compiled, _ = get_ttp_template(template_text)
+        return {"ok": True, "result": compiled.parse([data_text], one=True)}
+    except Exception as exc:
+        return {"ok": False, "error": str(exc)}
+
+
+def ttp_parse_inputs(compiled: TTPTemplate, items: list):
+    # One TTP run over every input; results come back per template, per input in
+    # add order. Templates with results="per_template" merge inputs, so those fall
+    # back to one run per input to keep per-device results.
+    per_template = compiled.parse([text for _, text in items], one=True)
+    if all(isinstance(results, list) and len(results) == len(items) for results in per_template):
+        for idx, (name, _) in enumerate(items):
+            yield name, {"ok": True, "result": [[results[idx]] for results in per_template]}
+        return
+    for name, text in items:
+        yield name, ttp_batch_item(compiled.template_text, text)
+
+
+@app.post("/api/ttp/batch")
+def ttp_batch_parser():
     payload = request.get_json(silent=True) or {}
-    action = payload.get("action", "exec")
 
-    def make_globals(var1_value, var2_value, var3_value):
+    try:
+        template_text, _ = payload_template("ttp", payload)
+    except (OSError, ValueError) as exc:
+        return error_response(str(exc))
+    if not template_text.strip():
+        return error_response("TTP template is required.")
+
+    try:
+        items = normalize_batch_inputs(payload.get("inputs"), "data")
+        compiled, cached = get_ttp_template(template_text)
+        if payload.get("processes"):
+            results = iter_batch(
+                ttp_batch_item,
+                [(name, (template_text, text)) for name, text in items],
+                workers=payload.get("workers"),
+                processes=True,
+            )
+        else:
+            results = list(ttp_parse_inputs(compiled, items))
+    except Exception as exc:
+        return engine_error_response(exc)
+
+    return batch_response(
+        results,
+        [name for name, _ in items],
+        extra={"cached": cached},
+        stream=bool(payload.get("stream", False)),
+    )
+
+
+PIPELINE_MAX_STAGES = 16
+PIPELINE_TEXT_STAGES = {"textfsm", "ttp", "load"}
+PIPELINE_FORMATS = {"json", "yaml", "yml", "xml", "csv", "ndjson"}
+
+
+def prepare_pipeline_stage(stage: Any) -> dict:
+    # Returns a plain, picklable stage dict with library templates resolved and the
+    # schema decoded; compiling here fills the engine caches and rejects bad stages
+    # before any input runs.
+    if not isinstance(stage, dict):
+        raise ValueError("must be an object")
+    kind = stage.get("type", "")
+    if kind in {"textfsm", "ttp", "jinja2"}:
+        template, template_name = payload_template(kind, stage)
+        if not template.strip():
+            raise ValueError("template is required")
+        prepared = {"type": kind, "template": template}
+        if template_name:
+            prepared["template_name"] = template_name
+        if kind == "jinja2":
+            variables = stage.get("variables") or {}
+            if not isinstance(variables, dict):
+                raise ValueError("variables must be an object")
+            prepared["variables"] = variables
+        {"textfsm": get_textfsm_template, "ttp": get_ttp_template, "jinja2": get_jinja_template}[kind](template)
+        return prepared
+    if kind == "jmespath":
+        expression = stage.get("expression", "")
+        if not expression.strip():
+            raise ValueError("expression is required")
+        get_jmespath(expression)
+        return {"type": kind, "expression": expression}
+    if kind == "json_schema":
+        schema = stage.get("schema", "")
+        if isinstance(schema, str):
+            if not schema.strip():
+                raise ValueError("schema is required")
+            schema = json.loads(schema)
+        on_invalid = stage.get("on_invalid", "stop")
+        if on_invalid not in {"stop", "continue"}:
+            raise ValueError("on_invalid must be stop or continue")
+        format_check = payload_flag(stage, "format_check")
+        get_schema_validator(schema, format_check)
         return {
-            "__builtins__": builtins.__dict__,
-            "json": json,
-            "re": re,
-            "math": math,
-            "datetime": datetime,
-            "ipaddress": ipaddress,
-            "itertools": itertools,
-            "functools": functools,
-            "collections": collections,
-            "random": random,
-            "value": var1_value,
-            "var1": var1_value,
-            "var2": var2_value,
-            "var3": var3_value,
+            "type": kind,
+            "schema": schema,
+            "format_check": format_check,
+            "max_errors": bounded_int(stage.get("max_errors"), 10, 1000),
+            "on_invalid": on_invalid,
         }
+    if kind in {"load", "dump"}:
+        fmt = str(stage.get("format", "json")).lower()
+        if fmt not in PIPELINE_FORMATS:
+            raise ValueError(f"unsupported format {fmt!r}")
+        return {"type": kind, "format": fmt, "pretty": payload_flag(stage, "pretty", True)}
+    raise ValueError("type must be one of textfsm, ttp, load, jmespath, json_schema, jinja2, dump")
+
+
+def prepare_pipeline(raw_stages: Any) -> list:
+    if not isinstance(raw_stages, list) or not raw_stages:
+        raise ValueError("At least one stage is required.")
+    if len(raw_stages) > PIPELINE_MAX_STAGES:
+        raise ValueError(f"Pipelines are limited to {PIPELINE_MAX_STAGES} stages.")
+    stages = []
+    for index, stage in enumerate(raw_stages):
+        try:
+            stages.append(prepare_pipeline_stage(stage))
+        except Exception as exc:
+            kind = stage.get("type", "?") if isinstance(stage, dict) else "?"
+            raise ValueError(f"Stage {index} ({kind}): {exc}") from exc
+    return stages
+
+
+def run_pipeline_stage(stage: dict, value: Any, timing: dict) -> Any:
+    kind = stage["type"]
+    if kind in PIPELINE_TEXT_STAGES and not isinstance(value, str):
+        raise ValueError(f"{kind} needs text input, got {json_type_name(value)}")
+    if kind == "textfsm":
+        compiled, _ = get_textfsm_template(stage["template"])
+        return [dict(zip(compiled.header, row)) for row in compiled.parse(value)]
+    if kind == "ttp":
+        compiled, _ = get_ttp_template(stage["template"])
+        return compiled.parse([value])
+    if kind == "load":
+        return parse_structured_input(stage["format"], value)
+    if kind == "jmespath":
+        compiled, _ = get_jmespath(stage["expression"])
+        return compiled.search(value)
+    if kind == "json_schema":
+        validator, _ = get_schema_validator(stage["schema"], stage["format_check"])
+        errors = []
+        for error in validator.iter_errors(value):
+            errors.append(describe_validation_error(error))
+            if len(errors) >= stage["max_errors"]:
+                break
+        timing["valid"] = not errors
+        if errors:
+            timing["errors"] = errors
+        return value
+    if kind == "jinja2":
+        template, _ = get_jinja_template(stage["template"])
+        # Mappings are also spread into the context so templates can use their keys directly.
+        context = {**stage["variables"], "data": value}
+        if isinstance(value, dict):
+            context.update(value)
+        return template.render(**context)
+    return dump_structured_output(stage["format"], value, stage["pretty"])
+
+
+def run_pipeline(stages: list, value: Any) -> dict:
+    # Stages hand Python objects straight to each other; nothing is re-serialised
+    # between them. Never raises, so it can run under iter_batch and the engine pool.
+    timings = []
+    valid = True
+    started = time.perf_counter()
+    for index, stage in enumerate(stages):
+        timing = {"stage": index, "type": stage["type"]}
+        start = time.perf_counter()
+        try:
+            value = run_pipeline_stage(stage, value, timing)
+        except Exception as exc:
+            timing["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            timings.append(timing)
+            error = f"Stage {index} ({stage['type']}): {exc}"
+            return {"ok": False, "error": error, "stage": index, "stages": timings}
+        timing["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        timings.append(timing)
+        if not timing.get("valid", True):
+            valid = False
+            if stage["on_invalid"] == "stop":
+                value = None
+                break
+    return {
+        "ok": True,
+        "valid": valid,
+        "result": value,
+        "stages": timings,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+    }
+
+
+@app.post("/api/pipeline")
+def pipeline_runner():
+    # One input in "input", or a batch in "inputs" ({"name": input} or
+    # [{"name": ..., "input": ...}]) run in parallel threads or processes.
+    payload = request.get_json(silent=True) or {}
+
+    try:
+        stages = prepare_pipeline(payload.get("stages"))
+        items = None
+        if payload.get("inputs") is not None:
+            items = normalize_batch_inputs(payload.get("inputs"), "input", text_only=False)
+    except Exception as exc:
+        return error_response(str(exc))
 
-    def serialize(value):
+    if items is not None:
         try:
-            json.dumps(value)
-            return value
-        except TypeError:
-            return repr(value)
+            results = iter_batch(
+                run_pipeline,
+                [(name, (stages, value)) for name, value in items],
+                workers=payload.get("workers"),
+                processes=bool(payload.get("processes", False)),
+            )
+        except PoolSaturated as exc:
+            return engine_error_response(exc)
+        return batch_response(
+            results,
+            [name for name, _ in items],
+            extra={"stage_count": len(stages)},
+            stream=bool(payload.get("stream", False)),
+        )
+
+    value = payload.get("input")
+    if value is None or isinstance(value, str) and not value.strip():
+        return error_response("Input is required.")
+    try:
+        outcome = run_engine_job(run_pipeline, stages, value)
+    except Exception as exc:
+        return engine_error_response(exc)
+    if not outcome["ok"]:
+        return jsonify(outcome), 400
+    return jsonify(outcome)
+
+
+CONFIG_TREE_CACHE = LRUCache("config_tree", cache_size_from_env("CONFIG_TREE_CACHE_SIZE", 256))
+DIFF_MAX_CONTEXT = 50
+
+
+def get_config_tree(text: str, ignore: list, comments: str):
+    # Keyed by content, so a config shared by many devices is parsed and hashed once.
+    def build():
+        patterns = tuple(get_regex(pattern)[0] for pattern in ignore)
+        return configdiff.parse_config(text, patterns, comments)
+
+    return CONFIG_TREE_CACHE.get_or_create(content_hash(text, comments, *ignore), build)
+
+
+def value_digest(value: Any) -> str:
+    return content_hash(value if isinstance(value, str) else json_bytes(value, sort_keys=True).decode("utf-8"))
+
+
+def config_diff_job(running: str, intended: str, ignore: list, comments: str, context: int) -> dict:
+    if not isinstance(running, str) or not isinstance(intended, str):
+        raise ValueError("running and intended must be config text.")
+    before, _ = get_config_tree(running, ignore, comments)
+    after, _ = get_config_tree(intended, ignore, comments)
+    return configdiff.diff_configs(before, after, context)
+
+
+def records_from_input(value: Any, template: str) -> list:
+    if isinstance(value, str):
+        if not template:
+            raise ValueError("Text inputs need a TextFSM template.")
+        compiled, _ = get_textfsm_template(template)
+        return [dict(zip(compiled.header, row)) for row in compiled.parse(value)]
+    if not isinstance(value, list):
+        raise ValueError("before and after must be record lists or device output text.")
+    return value
+
+
+def record_diff_job(before: Any, after: Any, template: str, key_fields: list) -> dict:
+    return configdiff.diff_records(
+        records_from_input(before, template), records_from_input(after, template), key_fields
+    )
+
+
+def diff_batch_item(job, *args: Any) -> dict:
+    try:
+        return {"ok": True, **job(*args)}
+    except Exception as exc:
+        return {"ok": False, "error": str(exc)}
+
+
+def fleet_diff_response(job, items: list, fields: tuple, options: tuple, payload: Any):
+    # Devices whose inputs hash the same share one diff; the others report it with
+    # duplicate_of. Unique pairs run through iter_batch and stream per device.
+    pairs = {}
+    members = collections.defaultdict(list)
+    inputs = set()
+    for name, item in items:
+        if not isinstance(item, dict):
+            raise ValueError(f"Device {name!r} must be an object with {' and '.join(fields)}.")
+        values = tuple(item.get(field) for field in fields)
+        digests = [value_digest(value) for value in values]
+        inputs.update(digests)
+        key = content_hash(*digests)
+        pairs.setdefault(key, (name, values))
+        members[key].append(name)
+
+    results = iter_batch(
+        diff_batch_item,
+        [(key, (job, *values, *options)) for key, (_, values) in pairs.items()],
+        workers=payload.get("workers"),
+        processes=bool(payload.get("processes", False)),
+    )
+
+    def per_device():
+        for key, outcome in results:
+            first = pairs[key][0]
+            for name in members[key]:
+                yield name, outcome if name == first else {**outcome, "duplicate_of": first}
+
+    return batch_response(
+        per_device(),
+        [name for name, _ in items],
+        extra={"unique_inputs": len(inputs), "unique_pairs": len(pairs)},
+        stream=bool(payload.get("stream", False)),
+    )
+
+
+@app.post("/api/diff/config")
+def config_diff():
+    # "running" vs "intended" for one device, or "devices" as {name: {running, intended}}
+    # or [{name, running, intended}]. Lines removed from running are "-", added "+".
+    payload = request.get_json(silent=True) or {}
+
+    try:
+        ignore = payload.get("ignore") or []
+        if not isinstance(ignore, list):
+            raise ValueError("ignore must be a list of regular expressions.")
+        for pattern in ignore:
+            get_regex(pattern)
+        context = bounded_int(payload.get("context"), 3, DIFF_MAX_CONTEXT)
+        options = (ignore, str(payload.get("comments", "!")), context)
+        if payload.get("devices") is not None:
+            items = normalize_batch_inputs(payload.get("devices"), None, text_only=False)
+            return fleet_diff_response(config_diff_job, items, ("running", "intended"), options, payload)
+    except Exception as exc:
+        return engine_error_response(exc)
+
+    running, intended = payload.get("running", ""), payload.get("intended", "")
+    if not isinstance(running, str) or not isinstance(intended, str):
+        return error_response("running and intended must be config text.")
+    if not running.strip() and not intended.strip():
+        return error_response("Running and intended config are required.")
+    try:
+        return jsonify({"ok": True, **run_engine_job(config_diff_job, running, intended, *options)})
+    except Exception as exc:
+        return engine_error_response(exc)
+
+
+@app.post("/api/diff/records")
+def record_diff():
+    # "before"/"after" record lists (or raw output parsed with a TextFSM template),
+    # matched on the "key" fields; "devices" runs a fleet like /api/diff/config.
+    payload = request.get_json(silent=True) or {}
+
+    try:
+        template = ""
+        if payload.get("template") or payload.get("template_name") or payload.get("command"):
+            template, _ = payload_template("textfsm", payload)
+            get_textfsm_template(template)
+        key_fields = payload.get("key") or []
+        if isinstance(key_fields, str):
+            key_fields = [key_fields]
+        options = (template, list(key_fields))
+        if payload.get("devices") is not None:
+            items = normalize_batch_inputs(payload.get("devices"), None, text_only=False)
+            return fleet_diff_response(record_diff_job, items, ("before", "after"), options, payload)
+    except Exception as exc:
+        return engine_error_response(exc)
+
+    if payload.get("before") is None or payload.get("after") is None:
+        return error_response("Before and after records are required.")
+    try:
+        result = run_engine_job(record_diff_job, payload["before"], payload["after"], *options)
+        return jsonify({"ok": True, **result})
+    except Exception as exc:
+        return engine_error_response(exc)
+
+
+PLAYGROUND_BROKER = None
+PLAYGROUND_BROKER_LOCK = threading.Lock()
+
+
+def get_playground_broker():
+    # With PLAYGROUND_BROKER set (host:port or socket path) every web worker talks
+    # to one shared broker process; otherwise sessions live in this process's broker.
+    global PLAYGROUND_BROKER
+    with PLAYGROUND_BROKER_LOCK:
+        if PLAYGROUND_BROKER is None:
+            address = os.environ.get("PLAYGROUND_BROKER", "")
+            if address:
+                PLAYGROUND_BROKER = playground.connect_broker(address)
+            else:
+                PLAYGROUND_BROKER = playground.PlaygroundBroker()
+        return PLAYGROUND_BROKER
+
+
+def playground_broker_error(exc: Exception):
+    # A remote broker that went away surfaces as EOFError/ConnectionError from the
+    # manager proxy; forget it so the next request reconnects.
+    global PLAYGROUND_BROKER
+    with PLAYGROUND_BROKER_LOCK:
+        PLAYGROUND_BROKER = None
+    return error_response(f"Playground broker unavailable: {str(exc) or type(exc).__name__}", 503)
+
+
+@app.post("/api/python-playground")
+@app.post("/api/function-tester")
+def python_playground():
+    payload = request.get_json(silent=True) or {}
+    action = payload.get("action", "exec")
 
     if action == "inspect":
         var1_info = parse_playground_var(payload.get("var1", ""))
@@ -463,10 +3091,12 @@ def python_playground():
         except Exception as exc:
             return error_response(str(exc))
 
-        session_id = str(uuid.uuid4())
-        FUNCTION_REPL_SESSIONS[session_id] = {
-            "globals": make_globals(var1_info["value"], var2_info["value"], var3_info["value"])
-        }
+        try:
+            session_id = get_playground_broker().start(
+                (var1_info["value"], var2_info["value"], var3_info["value"])
+            )
+        except Exception as exc:
+            return error_response(f"Could not start session: {exc}", 503)
         summary_lines = [
             "Session started. `value` aliases `var1`.",
             f"var1 type: {var1_info['type']}",
@@ -489,7 +3119,11 @@ def python_playground():
 
     if action == "reset":
         session_id = payload.get("session_id", "")
-        FUNCTION_REPL_SESSIONS.pop(session_id, None)
+        if session_id:
+            try:
+                get_playground_broker().reset(session_id)
+            except (EOFError, OSError) as exc:
+                return playground_broker_error(exc)
         return jsonify({"ok": True, "result": "Session reset."})
 
     if action == "lint":
@@ -531,41 +3165,24 @@ def python_playground():
     code_text = payload.get("function_code", "")
     if not session_id:
         return error_response("No active session. Click Start Session first.")
-    if session_id not in FUNCTION_REPL_SESSIONS:
-        return error_response("Session not found. Start a new session.")
     if not code_text.strip():
         return error_response("Code input is required.")
 
-    session_globals = FUNCTION_REPL_SESSIONS[session_id]["globals"]
-    stdout_buffer = io.StringIO()
-    stderr_buffer = io.StringIO()
-
-    result = None
-    has_result = False
     try:
-        with contextlib.redirect_stdout(stdout_buffer), contextlib.redirect_stderr(stderr_buffer):
-            try:
-                exec(code_text, session_globals)
-                if not stdout_buffer.getvalue().strip() and not stderr_buffer.getvalue().strip():
-                    try:
-                        result = eval(code_text, session_globals)
-                        has_result = True
-                    except SyntaxError:
-                        pass
-            except SyntaxError:
-                result = eval(code_text, session_globals)
-                has_result = True
-    except Exception:
-        stderr_buffer.write(traceback.format_exc())
+        outcome = get_playground_broker().execute(session_id, code_text)
+    except (EOFError, OSError) as exc:
+        return playground_broker_error(exc)
+    if not outcome["ok"]:
+        return error_response(outcome["error"])
+    return jsonify({"ok": True, "session_id": session_id, "result": outcome["result"]})
 
-    payload_out = {"stdout": stdout_buffer.getvalue(), "stderr": stderr_buffer.getvalue()}
-    if has_result:
-        payload_out["result"] = serialize(result)
 
-    if not payload_out["stdout"] and not payload_out["stderr"] and not has_result:
-        payload_out["stdout"] = "(no output)"
-
-    return jsonify({"ok": True, "session_id": session_id, "result": payload_out})
+def bounded_int(value: Any, default: int, upper: int) -> int:
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(0, min(number, upper))
 
 
 @app.post("/api/regex")
@@ -578,19 +3195,63 @@ def regex_tester():
         return error_response("Regex pattern is required.")
 
     try:
-        compiled = re.compile(pattern)
-        matches = [
-            {
-                "match": m.group(0),
-                "groups": list(m.groups()),
-                "start": m.start(),
-                "end": m.end(),
-            }
-            for m in compiled.finditer(text)
-        ]
-        return jsonify({"ok": True, "count": len(matches), "matches": matches})
+        flags = parse_regex_flags(payload.get("flags"))
+        offset = bounded_int(payload.get("offset"), 0, 2**31)
+        max_matches = bounded_int(payload.get("max_matches"), REGEX_PAGE_SIZE, REGEX_MAX_PAGE_SIZE) or 1
+        max_bytes = bounded_int(payload.get("max_bytes"), REGEX_MAX_BYTES, REGEX_MAX_BYTES * 16) or 1
+        result = run_regex_job(regex_scan, pattern, flags, text, offset, max_matches, max_bytes)
+        return jsonify({"ok": True, **result})
     except Exception as exc:
-        return error_response(str(exc))
+        return engine_error_response(exc, REGEX_TIMEOUT_MESSAGE)
+
+
+@app.post("/api/regex/multi")
+def regex_multi_tester():
+    # Named patterns scanned against a log in one line-by-line pass. Text comes from
+    # JSON "text" or a multipart "text" file upload.
+    if request.files:
+        payload = request.form
+        upload = request.files.get("text")
+        text = upload.read().decode("utf-8", errors="replace") if upload else ""
+        raw_patterns = payload.get("patterns") or "{}"
+    else:
+        payload = request.get_json(silent=True) or {}
+        text = payload.get("text", "")
+        raw_patterns = payload.get("patterns")
+
+    try:
+        if request.files:
+            try:
+                raw_patterns = json.loads(raw_patterns)
+            except ValueError as exc:
+                return error_response(f"patterns is not valid JSON: {exc}")
+        if isinstance(raw_patterns, dict):
+            named = [(str(name), value) for name, value in raw_patterns.items()]
+        elif isinstance(raw_patterns, list):
+            named = [(str(value), value) for value in raw_patterns]
+        else:
+            named = []
+        if not named:
+            return error_response("patterns must be a non-empty list or object of regex patterns.")
+        default_flags = parse_regex_flags(payload.get("flags"))
+        patterns = []
+        for name, value in named:
+            # Each entry is a pattern string or {"pattern": ..., "flags": ...}.
+            if isinstance(value, dict):
+                pattern, flags = value.get("pattern", ""), parse_regex_flags(value.get("flags"))
+            else:
+                pattern, flags = value, default_flags
+            if not isinstance(pattern, str) or not pattern:
+                return error_response(f"Pattern {name!r} is empty.")
+            get_regex(pattern, flags)
+            patterns.append((name, pattern, flags))
+        max_spans = bounded_int(payload.get("max_spans"), 100, REGEX_MAX_PAGE_SIZE)
+        start = time.perf_counter()
+        results = run_regex_job(regex_scan_lines, patterns, text, max_spans)
+        elapsed = round((time.perf_counter() - start) * 1000, 3)
+        return jsonify({"ok": True, "results": results, "elapsed_ms": elapsed})
+    except Exception as exc:
+        return engine_error_response(exc, REGEX_TIMEOUT_MESSAGE)
 
 
 @app.post("/api/base64")
@@ -611,6 +3272,60 @@ def base64_tool():
         return error_response(str(exc))
 
 
+def warm_up_engines(names: Any) -> list:
+    # Preloads engines ("all" or names from engines.ENGINES) so the first request
+    # does not pay their import; call from a server post-fork hook or via ENGINE_WARMUP.
+    if isinstance(names, str):
+        names = engines.parse_engine_names(names)
+    return engines.warm_up(names)
+
+
+if os.environ.get("ENGINE_WARMUP"):
+    warm_up_engines(os.environ["ENGINE_WARMUP"])
+
+# ASGI entry point for uvicorn/hypercorn (`uvicorn app:asgi_app`); needs asgiref.
+asgi_app = WsgiToAsgi(app) if WsgiToAsgi is not None else None
+
+
+def serve(host: str, port: int) -> None:
+    # Production launcher: gunicorn with WEB_WORKERS processes x WEB_THREADS threads
+    # when it is installed, otherwise the threaded Werkzeug server.
+    global WEB_PROCESSES
+    workers = int(os.environ.get("WEB_WORKERS", "2"))
+    threads = int(os.environ.get("WEB_THREADS", "8"))
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        print("gunicorn is not installed; serving with the threaded Werkzeug server.", file=sys.stderr)
+        app.run(host=host, port=port, threaded=True)
+        return
+    WEB_PROCESSES = workers
+
+    class GunicornApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"{host}:{port}")
+            self.cfg.set("workers", workers)
+            self.cfg.set("threads", threads)
+            self.cfg.set("timeout", int(ENGINE_TIMEOUT) + 30)
+
+        def load(self):
+            return app
+
+    GunicornApplication().run()
+
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "playground-broker":
+        try:
+            playground.serve_broker(os.environ.get("PLAYGROUND_BROKER", "127.0.0.1:5001"))
+        except RuntimeError as exc:
+            sys.exit(str(exc))
+        sys.exit(0)
+    if len(sys.argv) > 1 and sys.argv[1] == "profile-startup":
+        engines.print_startup_profile(engines.profile_startup("app"))
+        sys.exit(0)
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        serve(os.environ.get("HOST", "127.0.0.1"), int(os.environ.get("PORT", "5000")))
+        sys.exit(0)
     debug_enabled = os.environ.get("FLASK_DEBUG", "0") == "1"
     app.run(host="127.0.0.1", port=5000, debug=debug_enabled)
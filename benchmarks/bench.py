@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+import argparse
+import gzip
+import io
+import json
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+sys.path.insert(0, str(BENCH_DIR))
+
+import fixtures  # noqa: E402
+
+BASELINE_DIR = BENCH_DIR / "baselines"
+OC_NAMESPACES = {"oc": fixtures.NETCONF_NS}
+PIPELINE_ROW_SCHEMA = {
+    "type": "object",
+    "required": ["name", "mtu"],
+    "properties": {"name": {"type": "string"}, "mtu": {"type": "string"}, "errors": {"type": "string"}},
+}
+PIPELINE_TEMPLATE = "{% for row in data %}interface {{ row.name }}\n mtu {{ row.mtu }}\n{% endfor %}"
+
+
+def json_case(path, body):
+    encoded = json.dumps(body).encode("utf-8")
+    return len(encoded), lambda: {"path": path, "data": encoded, "content_type": "application/json"}
+
+
+def raw_case(path, body, query):
+    return len(body), lambda: {"path": path, "data": body, "query_string": query, "content_type": "text/plain"}
+
+
+def upload_case(path, fields, field, filename, body):
+    return len(body), lambda: {"path": path, "data": {**fields, field: (io.BytesIO(body), filename)}}
+
+
+def device_outputs(devices):
+    return {f"edge{index:04d}": fixtures.show_interfaces(48, seed=index) for index in range(devices)}
+
+
+def case_textfsm(count):
+    body = {"template": fixtures.SHOW_INTERFACES_TEMPLATE, "text": fixtures.show_interfaces(count)}
+    return json_case("/api/textfsm", body)
+
+
+def case_textfsm_raw(count):
+    body = fixtures.show_interfaces(count).encode("utf-8")
+    return raw_case("/api/textfsm", body, {"template_name": "cisco_ios_show_interfaces"})
+
+
+def case_textfsm_gzip(count):
+    body = {"template": fixtures.SHOW_INTERFACES_TEMPLATE, "text": fixtures.show_interfaces(count)}
+    encoded = gzip.compress(json.dumps(body).encode("utf-8"))
+    headers = {"Content-Encoding": "gzip", "Accept-Encoding": "gzip"}
+    return len(encoded), lambda: {
+        "path": "/api/textfsm",
+        "data": encoded,
+        "content_type": "application/json",
+        "headers": headers,
+    }
+
+
+def case_textfsm_batch(count):
+    outputs = device_outputs(max(2, count // 10))
+    return json_case("/api/textfsm/batch", {"template": fixtures.SHOW_INTERFACES_TEMPLATE, "outputs": outputs})
+
+
+def case_ttp(count):
+    body = {"template": fixtures.SHOW_INTERFACES_TTP, "data": fixtures.show_interfaces(count)}
+    return json_case("/api/ttp", body)
+
+
+def case_ttp_batch(count):
+    inputs = device_outputs(max(2, count // 10))
+    return json_case("/api/ttp/batch", {"template": fixtures.SHOW_INTERFACES_TTP, "inputs": inputs})
+
+
+def case_xpath(count):
+    expression = (
+        "//*[local-name()='interface'][.//*[local-name()='oper-status']='DOWN']/*[local-name()='name']/text()"
+    )
+    return json_case("/api/xpath", {"xml": fixtures.netconf_interfaces(count), "xpath": expression})
+
+
+def case_xpath_multi(count):
+    expressions = {
+        "names": "//oc:interface/oc:name/text()",
+        "down": "count(//oc:interface[oc:state/oc:oper-status='DOWN'])",
+        "jumbo": "//oc:interface[oc:config/oc:mtu>1500]/oc:name/text()",
+    }
+    body = {"xml": fixtures.netconf_interfaces(count), "expressions": expressions, "namespaces": OC_NAMESPACES}
+    return json_case("/api/xpath/multi", body)
+
+
+def case_xpath_stream(count):
+    query = {"path": "interfaces/interface", "xpath": "string(*[local-name()='name'])"}
+    return raw_case("/api/xpath/stream", fixtures.netconf_interfaces(count).encode("utf-8"), query)
+
+
+def case_diff_config(count):
+    return json_case("/api/diff/config", {"devices": fixtures.fleet_configs(count)})
+
+
+def case_diff_records(count):
+    before = fixtures.telemetry_records(count)
+    after = json.loads(json.dumps(before))
+    for record in after[::10]:
+        record["oper_status"] = "DOWN" if record["oper_status"] == "UP" else "UP"
+        record["counters"]["in_errors"] += 1
+    body = {"before": before, "after": after, "key": ["device", "interface", "timestamp"]}
+    return json_case("/api/diff/records", body)
+
+
+def case_json_schema(count):
+    schema = {"type": "array", "items": fixtures.TELEMETRY_SCHEMA}
+    body = {"schema": json.dumps(schema), "data": json.dumps(fixtures.telemetry_records(count))}
+    return json_case("/api/json-schema", body)
+
+
+def case_json_schema_bulk(count):
+    body = {
+        "schema": json.dumps(fixtures.TELEMETRY_SCHEMA),
+        "data": fixtures.ndjson(fixtures.telemetry_records(count)),
+        "data_format": "ndjson",
+    }
+    return json_case("/api/json-schema/bulk", body)
+
+
+def case_jmespath(count):
+    body = {
+        "data": json.dumps(fixtures.telemetry_records(count)),
+        "expression": "[?oper_status=='DOWN'].{device: device, interface: interface, errors: counters.in_errors}",
+    }
+    return json_case("/api/jmespath", body)
+
+
+def case_jmespath_bulk(count):
+    body = {
+        "data": fixtures.ndjson(fixtures.telemetry_records(count)),
+        "expressions": {"device": "device", "down": "oper_status == 'DOWN'", "in_errors": "counters.in_errors"},
+    }
+    return json_case("/api/jmespath/bulk", body)
+
+
+def case_convert(count):
+    content = json.dumps(fixtures.telemetry_records(count))
+    body = {"source_format": "json", "target_format": "yaml", "content": content}
+    return json_case("/api/convert", body)
+
+
+def case_convert_xml(count):
+    body = {"source_format": "xml", "target_format": "json", "content": fixtures.netconf_interfaces(count)}
+    return json_case("/api/convert", body)
+
+
+def case_convert_stream(count):
+    content = fixtures.ndjson(fixtures.telemetry_records(count)).encode("utf-8")
+    return raw_case("/api/convert/stream", content, {"source_format": "ndjson", "target_format": "yaml"})
+
+
+def case_data_model(count):
+    body = {"sample_data": json.dumps(fixtures.telemetry_records(count)), "model_type": "pydantic"}
+    return json_case("/api/data-model", body)
+
+
+def case_jinja2(count):
+    hosts = fixtures.host_vars(1)
+    variables = next(iter(hosts.values()))
+    variables["interfaces"] = [
+        dict(variables["interfaces"][index % 24], name=name)
+        for index, name in enumerate(fixtures.interface_names(count))
+    ]
+    return json_case("/api/jinja2", {"template": fixtures.CONFIG_TEMPLATE, "variables": json.dumps(variables)})
+
+
+def case_jinja2_batch(count):
+    hosts = fixtures.host_vars(max(2, count // 5))
+    return json_case("/api/jinja2/batch", {"template": fixtures.CONFIG_TEMPLATE, "variable_sets": hosts})
+
+
+def case_jinja2_fleet(count):
+    archive = fixtures.host_vars_archive(fixtures.host_vars(max(2, count // 5)))
+    fields = {"template": fixtures.CONFIG_TEMPLATE}
+    return upload_case("/api/jinja2/fleet", fields, "archive", "hosts.tgz", archive)
+
+
+def case_pipeline(count):
+    stages = [
+        {"type": "textfsm", "template": fixtures.SHOW_INTERFACES_TEMPLATE},
+        {"type": "jmespath", "expression": "[].{name: INTERFACE, mtu: MTU, errors: INPUT_ERRORS}"},
+        {"type": "json_schema", "schema": {"type": "array", "items": PIPELINE_ROW_SCHEMA}},
+        {"type": "jinja2", "template": PIPELINE_TEMPLATE},
+    ]
+    return json_case("/api/pipeline", {"stages": stages, "input": fixtures.show_interfaces(count)})
+
+
+def case_python_playground(count):
+    # Sessions live in the app process's broker, so one is started up front and
+    # every iteration runs the same short loop in it.
+    from app import app
+
+    started = app.test_client().post("/api/python-playground", json={"action": "init", "var1": str(count)})
+    body = {
+        "action": "exec",
+        "session_id": started.get_json()["session_id"],
+        "function_code": "total = 0\nfor index in range(var1):\n    total += index * index\ntotal",
+    }
+    return json_case("/api/python-playground", body)
+
+
+def case_regex(count):
+    body = {"pattern": fixtures.SYSLOG_PATTERNS["link_updown"], "text": fixtures.syslog_lines(count)}
+    return json_case("/api/regex", body)
+
+
+def case_regex_multi(count):
+    body = {"patterns": fixtures.SYSLOG_PATTERNS, "text": fixtures.syslog_lines(count)}
+    return json_case("/api/regex/multi", body)
+
+
+def case_base64(count):
+    return json_case("/api/base64", {"mode": "encode", "text": fixtures.show_interfaces(count)})
+
+
+CASES = {
+    name.removeprefix("case_"): func
+    for name, func in sorted(globals().items())
+    if name.startswith("case_") and callable(func)
+}
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_case(name, size, min_time, max_iterations):
+    from app import app
+
+    client = app.test_client()
+    payload_bytes, make_request = CASES[name](fixtures.SIZES[size])
+    baseline_rss = peak_rss_mb()
+
+    def send():
+        kwargs = make_request()
+        response = client.post(kwargs.pop("path"), **kwargs)
+        body = response.get_data()
+        response.close()
+        if response.status_code != 200:
+            raise RuntimeError(f"{name}/{size}: HTTP {response.status_code}: {body[:300]!r}")
+        return len(body)
+
+    response_bytes = send()
+    latencies = []
+    started = time.perf_counter()
+    while len(latencies) < max_iterations and (len(latencies) < 3 or time.perf_counter() - started < min_time):
+        begin = time.perf_counter()
+        send()
+        latencies.append(time.perf_counter() - begin)
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    peak = peak_rss_mb()
+    return {
+        "case": name,
+        "size": size,
+        "payload_kb": round(payload_bytes / 1024, 1),
+        "response_kb": round(response_bytes / 1024, 1),
+        "iterations": len(latencies),
+        "req_per_s": round(len(latencies) / elapsed, 2),
+        "mb_per_s": round(payload_bytes * len(latencies) / elapsed / (1024 * 1024), 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "peak_rss_mb": peak,
+        "rss_growth_mb": round(peak - baseline_rss, 1),
+    }
+
+
+def run_isolated(name, size, args):
+    # One interpreter per case so peak RSS belongs to that case and payload size.
+    command = [
+        sys.executable,
+        __file__,
+        "--run-one",
+        f"{name}:{size}",
+        "--min-time",
+        str(args.min_time),
+        "--max-iterations",
+        str(args.max_iterations),
+    ]
+    env = dict(os.environ)
+    if not args.pools:
+        # Run engines in-process so latency and RSS measure the engines, not IPC.
+        env.setdefault("ENGINE_WORKERS", "0")
+        env.setdefault("REGEX_WORKERS", "0")
+    if not args.response_cache:
+        # Identical requests would otherwise only measure response cache hits.
+        env.setdefault("RESPONSE_CACHE_MB", "0")
+    completed = subprocess.run(command, capture_output=True, text=True, env=env, check=False)
+    if completed.returncode != 0:
+        return {"case": name, "size": size, "error": completed.stderr.strip().splitlines()[-1:]}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def compare(results, baseline, threshold):
+    previous = {f"{item['case']}/{item['size']}": item for item in baseline.get("results", [])}
+    regressions = []
+    for item in results:
+        before = previous.get(f"{item['case']}/{item['size']}")
+        if before is None or "error" in item or "error" in before:
+            continue
+        item["p50_delta"] = round(item["p50_ms"] / before["p50_ms"] - 1, 3) if before["p50_ms"] else 0.0
+        item["rps_delta"] = round(item["req_per_s"] / before["req_per_s"] - 1, 3) if before["req_per_s"] else 0.0
+        if item["p50_delta"] > threshold:
+            regressions.append(item)
+    return regressions
+
+
+def print_table(results):
+    columns = ["case", "size", "payload_kb", "iterations", "req_per_s", "mb_per_s", "p50_ms", "p99_ms"]
+    columns.append("peak_rss_mb")
+    if any("p50_delta" in item for item in results):
+        columns += ["p50_delta", "rps_delta"]
+    rows = [columns]
+    for item in results:
+        if "error" in item:
+            rows.append([item["case"], item["size"], f"error: {' '.join(item['error'])}"])
+            continue
+        row = []
+        for column in columns:
+            value = item.get(column, "")
+            row.append(f"{value:+.1%}" if column.endswith("_delta") and value != "" else str(value))
+        rows.append(row)
+    full_rows = [row for row in rows if len(row) == len(columns)]
+    widths = [max(len(row[index]) for row in full_rows) for index in range(len(columns))]
+    for row in rows:
+        if len(row) == len(columns):
+            row = [cell.ljust(widths[index]) for index, cell in enumerate(row)]
+        print("  ".join(row).rstrip())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every /api endpoint with generated network fixtures.")
+    parser.add_argument("--cases", default="", help="comma-separated case names (default: all)")
+    parser.add_argument("--sizes", default="small,medium", help=f"comma-separated: {', '.join(fixtures.SIZES)}")
+    parser.add_argument("--min-time", type=float, default=1.0, help="seconds to run each case")
+    parser.add_argument("--max-iterations", type=int, default=500)
+    parser.add_argument("--pools", action="store_true", help="keep the engine/regex worker pools enabled")
+    parser.add_argument("--response-cache", action="store_true", help="keep the response cache enabled")
+    parser.add_argument("--save", metavar="NAME", help="store results as benchmarks/baselines/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="compare against a stored baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="p50 slowdown that counts as a regression")
+    parser.add_argument("--list", action="store_true", help="list case names and exit")
+    parser.add_argument("--run-one", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.list:
+        print("\n".join(CASES))
+        return 0
+    if args.run_one:
+        name, size = args.run_one.split(":")
+        print(json.dumps(run_case(name, size, args.min_time, args.max_iterations)))
+        return 0
+
+    names = [name.strip() for name in args.cases.split(",") if name.strip()] or list(CASES)
+    sizes = [size.strip() for size in args.sizes.split(",") if size.strip()]
+    unknown = [name for name in names if name not in CASES]
+    unknown += [size for size in sizes if size not in fixtures.SIZES]
+    if unknown:
+        parser.error(f"unknown case or size: {', '.join(unknown)}")
+
+    results = []
+    for name in names:
+        for size in sizes:
+            result = run_isolated(name, size, args)
+            results.append(result)
+            print(f"{name}/{size}: {result.get('p50_ms', 'error')} ms p50", file=sys.stderr)
+
+    regressions = []
+    if args.compare:
+        baseline = json.loads((BASELINE_DIR / f"{args.compare}.json").read_text())
+        regressions = compare(results, baseline, args.threshold)
+    print_table(results)
+
+    if args.save:
+        BASELINE_DIR.mkdir(exist_ok=True)
+        document = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pools": args.pools,
+            "results": results,
+        }
+        (BASELINE_DIR / f"{args.save}.json").write_text(json.dumps(document, indent=2) + "\n")
+    if regressions:
+        print(f"\n{len(regressions)} case(s) slower than baseline by over {args.threshold:.0%}:", file=sys.stderr)
+        for item in regressions:
+            print(f"  {item['case']}/{item['size']}: p50 {item['p50_delta']:+.1%}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
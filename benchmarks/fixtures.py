@@ -0,0 +1,260 @@
+import io
+import json
+import random
+import tarfile
+
+import jinja2
+import yaml
+
+SIZES = {"small": 10, "medium": 250, "large": 2500}
+
+SHOW_INTERFACES_TEMPLATE = """\
+Value Required INTERFACE (\\S+)
+Value LINK_STATUS (.+?)
+Value PROTOCOL_STATUS (.+?)
+Value HARDWARE_TYPE (.+?)
+Value ADDRESS ([a-fA-F0-9]{4}\\.[a-fA-F0-9]{4}\\.[a-fA-F0-9]{4})
+Value DESCRIPTION (.*?)
+Value IP_ADDRESS (\\d+\\.\\d+\\.\\d+\\.\\d+/\\d+)
+Value MTU (\\d+)
+Value BANDWIDTH (\\d+\\s+\\w+)
+Value INPUT_PACKETS (\\d+)
+Value OUTPUT_PACKETS (\\d+)
+Value INPUT_ERRORS (\\d+)
+Value OUTPUT_ERRORS (\\d+)
+
+Start
+  ^\\S+\\s+is\\s+.+?,\\s+line\\s+protocol -> Continue.Record
+  ^${INTERFACE}\\s+is\\s+${LINK_STATUS},\\s+line\\s+protocol\\s+is\\s+${PROTOCOL_STATUS}\\s*$$
+  ^\\s+Hardware\\s+is\\s+${HARDWARE_TYPE},\\s+address\\s+is\\s+${ADDRESS}
+  ^\\s+Description:\\s+${DESCRIPTION}\\s*$$
+  ^\\s+Internet\\s+address\\s+is\\s+${IP_ADDRESS}
+  ^\\s+MTU\\s+${MTU}.*BW\\s+${BANDWIDTH}
+  ^\\s+${INPUT_PACKETS}\\s+packets\\s+input
+  ^\\s+${INPUT_ERRORS}\\s+input\\s+errors
+  ^\\s+${OUTPUT_PACKETS}\\s+packets\\s+output
+  ^\\s+${OUTPUT_ERRORS}\\s+output\\s+errors
+"""
+
+SHOW_INTERFACES_TTP = """\
+<group name="interfaces">
+{{ interface }} is {{ link_status | ORPHRASE }}, line protocol is {{ protocol_status }}
+  Hardware is {{ hardware | ORPHRASE }}, address is {{ mac }} (bia {{ bia }})
+  Description: {{ description | re(".+") }}
+  Internet address is {{ ip }}
+  MTU {{ mtu | to_int }} bytes, BW {{ bandwidth }} Kbit/sec, DLY {{ delay }} usec,
+     {{ input_packets | to_int }} packets input, {{ input_bytes | to_int }} bytes, 0 no buffer
+     {{ output_packets | to_int }} packets output, {{ output_bytes | to_int }} bytes, 0 underruns
+</group>
+"""
+
+CONFIG_TEMPLATE = """\
+hostname {{ hostname }}
+!
+{% for vlan in vlans %}
+vlan {{ vlan.id }}
+ name {{ vlan.name }}
+{% endfor %}
+!
+{% for intf in interfaces %}
+interface {{ intf.name }}
+ description {{ intf.description }}
+{% if intf.ip %}
+ ip address {{ intf.ip }} {{ intf.mask }}
+{% else %}
+ switchport access vlan {{ intf.vlan }}
+{% endif %}
+ {{ "no shutdown" if intf.enabled else "shutdown" }}
+!
+{% endfor %}
+router bgp {{ bgp.asn }}
+{% for peer in bgp.neighbors %}
+ neighbor {{ peer.ip }} remote-as {{ peer.asn }}
+{% endfor %}
+"""
+
+NETCONF_NS = "http://openconfig.net/yang/interfaces"
+
+TELEMETRY_SCHEMA = {
+    "type": "object",
+    "required": ["device", "timestamp", "interface", "counters", "oper_status"],
+    "properties": {
+        "device": {"type": "string"},
+        "timestamp": {"type": "string", "format": "date-time"},
+        "interface": {"type": "string"},
+        "oper_status": {"enum": ["UP", "DOWN"]},
+        "counters": {
+            "type": "object",
+            "required": ["in_octets", "out_octets"],
+            "properties": {
+                "in_octets": {"type": "integer", "minimum": 0},
+                "out_octets": {"type": "integer", "minimum": 0},
+                "in_errors": {"type": "integer", "minimum": 0},
+                "out_errors": {"type": "integer", "minimum": 0},
+            },
+        },
+    },
+}
+
+SYSLOG_PATTERNS = {
+    "link_updown": r"%LINK-3-UPDOWN: Interface (\S+), changed state to (\w+)",
+    "lineproto": r"%LINEPROTO-5-UPDOWN: Line protocol on Interface (\S+)",
+    "bgp_adj": r"%BGP-5-ADJCHANGE: neighbor (\S+) (Up|Down)",
+    "config": r"%SYS-5-CONFIG_I: Configured from (\S+) by (\S+)",
+    "auth_fail": r"%SEC_LOGIN-4-LOGIN_FAILED",
+}
+
+
+def interface_names(count: int) -> list:
+    return [f"GigabitEthernet{index // 48}/{index % 48}" for index in range(count)]
+
+
+def show_interfaces(count: int, seed: int = 1) -> str:
+    rng = random.Random(seed)
+    blocks = []
+    for index, name in enumerate(interface_names(count)):
+        up = rng.random() > 0.2
+        status = "up" if up else "administratively down"
+        mac = f"5254.00{index // 256 % 256:02x}.{index % 256:02x}01"
+        lines = [
+            f"{name} is {status}, line protocol is {'up' if up else 'down'}",
+            f"  Hardware is iGbE, address is {mac} (bia {mac})",
+            f"  Description: {'uplink' if index % 8 == 0 else 'access'}-port-{index}",
+        ]
+        if index % 4 == 0:
+            lines.append(f"  Internet address is 10.{index // 256 % 256}.{index % 256}.1/24")
+        lines += [
+            "  MTU 1500 bytes, BW 1000000 Kbit/sec, DLY 10 usec,",
+            "     reliability 255/255, txload 1/255, rxload 1/255",
+            "  Encapsulation ARPA, loopback not set",
+            "  Full Duplex, 1000Mbps, link type is auto, media type is RJ45",
+            "  Last input 00:00:01, output 00:00:00, output hang never",
+            "  Queueing strategy: fifo",
+            f"  5 minute input rate {rng.randint(0, 10**6)} bits/sec, {rng.randint(0, 900)} packets/sec",
+            f"  5 minute output rate {rng.randint(0, 10**6)} bits/sec, {rng.randint(0, 900)} packets/sec",
+            f"     {rng.randint(0, 10**9)} packets input, {rng.randint(0, 10**12)} bytes, 0 no buffer",
+            f"     Received {rng.randint(0, 10**5)} broadcasts (0 IP multicasts)",
+            f"     {rng.randint(0, 50)} input errors, 0 CRC, 0 frame, 0 overrun, 0 ignored",
+            f"     {rng.randint(0, 10**9)} packets output, {rng.randint(0, 10**12)} bytes, 0 underruns",
+            f"     {rng.randint(0, 50)} output errors, 0 collisions, 1 interface resets",
+        ]
+        blocks.append("\n".join(lines))
+    return "\n".join(blocks) + "\n"
+
+
+def netconf_interfaces(count: int, seed: int = 1) -> str:
+    rng = random.Random(seed)
+    parts = [
+        '<rpc-reply xmlns="urn:ietf:params:xml:ns:netconf:base:1.0" message-id="101"><data>',
+        f'<interfaces xmlns="{NETCONF_NS}">',
+    ]
+    for index, name in enumerate(interface_names(count)):
+        enabled = "true" if rng.random() > 0.2 else "false"
+        parts.append(
+            f"<interface><name>{name}</name>"
+            f"<config><name>{name}</name><description>port-{index}</description>"
+            f"<mtu>{rng.choice((1500, 9000, 9216))}</mtu><enabled>{enabled}</enabled></config>"
+            f"<state><oper-status>{'UP' if enabled == 'true' else 'DOWN'}</oper-status>"
+            f"<counters><in-octets>{rng.randint(0, 10**12)}</in-octets>"
+            f"<out-octets>{rng.randint(0, 10**12)}</out-octets>"
+            f"<in-errors>{rng.randint(0, 50)}</in-errors></counters></state></interface>"
+        )
+    parts.append("</interfaces></data></rpc-reply>")
+    return "".join(parts)
+
+
+def telemetry_records(count: int, seed: int = 1) -> list:
+    rng = random.Random(seed)
+    devices = [f"leaf{index:03d}" for index in range(max(1, count // 24))]
+    names = interface_names(48)
+    return [
+        {
+            "device": devices[index % len(devices)],
+            "timestamp": f"2024-05-01T12:{index // 60 % 60:02d}:{index % 60:02d}Z",
+            "interface": names[index % len(names)],
+            "oper_status": "UP" if rng.random() > 0.1 else "DOWN",
+            "counters": {
+                "in_octets": rng.randint(0, 10**12),
+                "out_octets": rng.randint(0, 10**12),
+                "in_errors": rng.randint(0, 20),
+                "out_errors": rng.randint(0, 20),
+            },
+            "labels": {"site": f"dc{index % 3 + 1}", "role": rng.choice(("leaf", "spine", "border"))},
+        }
+        for index in range(count)
+    ]
+
+
+def host_vars(count: int, seed: int = 1) -> dict:
+    rng = random.Random(seed)
+    hosts = {}
+    for index in range(count):
+        hostname = f"edge{index:04d}"
+        hosts[hostname] = {
+            "hostname": hostname,
+            "vlans": [{"id": 100 + v, "name": f"vlan-{100 + v}"} for v in range(8)],
+            "interfaces": [
+                {
+                    "name": name,
+                    "description": f"{hostname}-{name}",
+                    "ip": f"10.{index % 256}.{port}.1" if port % 6 == 0 else None,
+                    "mask": "255.255.255.0",
+                    "vlan": 100 + port % 8,
+                    "enabled": rng.random() > 0.1,
+                }
+                for port, name in enumerate(interface_names(24))
+            ],
+            "bgp": {
+                "asn": 65000 + index,
+                "neighbors": [{"ip": f"192.0.2.{n + 1}", "asn": 64512 + n} for n in range(4)],
+            },
+        }
+    return hosts
+
+
+def host_vars_archive(hosts: dict) -> bytes:
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        for hostname, variables in hosts.items():
+            data = yaml.safe_dump(variables, sort_keys=False).encode("utf-8")
+            info = tarfile.TarInfo(f"host_vars/{hostname}.yml")
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+def fleet_configs(count: int, seed: int = 1) -> dict:
+    # Rendered intended configs; every 10th device's running config has drifted.
+    rng = random.Random(seed)
+    template = jinja2.Environment(trim_blocks=True, lstrip_blocks=True).from_string(CONFIG_TEMPLATE)
+    devices = {}
+    for index, (hostname, variables) in enumerate(host_vars(count, seed).items()):
+        intended = template.render(**variables)
+        running = intended
+        if index % 10 == 0:
+            lines = intended.splitlines()
+            lines[rng.randrange(len(lines))] += " ! drift"
+            running = "\n".join(lines) + "\n"
+        devices[hostname] = {"running": running, "intended": intended}
+    return devices
+
+
+def syslog_lines(count: int, seed: int = 1) -> str:
+    rng = random.Random(seed)
+    names = interface_names(48)
+    messages = [
+        lambda: f"%LINK-3-UPDOWN: Interface {rng.choice(names)}, changed state to {rng.choice(('up', 'down'))}",
+        lambda: f"%LINEPROTO-5-UPDOWN: Line protocol on Interface {rng.choice(names)}, changed state to up",
+        lambda: f"%BGP-5-ADJCHANGE: neighbor 192.0.2.{rng.randint(1, 254)} {rng.choice(('Up', 'Down'))}",
+        lambda: "%SYS-5-CONFIG_I: Configured from console by admin on vty0",
+        lambda: "%SEC_LOGIN-4-LOGIN_FAILED: Login failed [user: guest] [Source: 198.51.100.7]",
+        lambda: "%SYS-6-LOGGINGHOST_STARTSTOP: Logging to host 203.0.113.5 port 514 started",
+    ]
+    return "".join(
+        f"May  1 12:{index // 60 % 60:02d}:{index % 60:02d} edge{index % 40:04d} {rng.choice(messages)()}\n"
+        for index in range(count * 20)
+    )
+
+
+def ndjson(records: list) -> str:
+    return "".join(json.dumps(record) + "\n" for record in records)
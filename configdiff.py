@@ -0,0 +1,179 @@
+import collections
+import difflib
+import hashlib
+import json
+
+INDENT = " "
+STAT_NAMES = (
+    "sections_unchanged", "sections_changed", "sections_added", "sections_removed", "lines_added", "lines_removed"
+)
+
+
+# One config line and the lines indented beneath it. digest covers the line and,
+# in order, every child digest, so equal digests mean identical subtrees; size
+# counts the lines in the subtree.
+class ConfigSection:
+    __slots__ = ("line", "children", "digest", "size")
+
+    def __init__(self, line: str):
+        self.line = line
+        self.children = []
+        self.digest = b""
+        self.size = 1
+
+    def seal(self) -> bytes:
+        hasher = hashlib.blake2b(self.line.encode("utf-8") + b"\0", digest_size=16)
+        for child in self.children:
+            hasher.update(child.seal())
+            self.size += child.size
+        self.digest = hasher.digest()
+        return self.digest
+
+    def render(self, depth: int = 0) -> list:
+        lines = [INDENT * depth + self.line]
+        for child in self.children:
+            lines.extend(child.render(depth + 1))
+        return lines
+
+
+def parse_config(text: str, ignore: tuple = (), comments: str = "!") -> ConfigSection:
+    # Nests each line under the nearest less-indented line above it. Blank lines,
+    # comment lines (any prefix in comments, "!" for IOS) and lines matching an
+    # ignore pattern are dropped before hashing.
+    root = ConfigSection("")
+    stack = [(-1, root)]
+    prefixes = tuple(comments)
+    for raw in text.splitlines():
+        line = raw.expandtabs().rstrip()
+        stripped = line.lstrip()
+        if not stripped or prefixes and stripped.startswith(prefixes):
+            continue
+        if ignore and any(pattern.search(line) for pattern in ignore):
+            continue
+        indent = len(line) - len(stripped)
+        while stack[-1][0] >= indent:
+            stack.pop()
+        node = ConfigSection(stripped)
+        stack[-1][1].children.append(node)
+        stack.append((indent, node))
+    root.seal()
+    return root
+
+
+def keyed(sections: list) -> dict:
+    # Repeated lines at one level ("exit-address-family", "}") are told apart by ordinal.
+    seen = collections.Counter()
+    keys = {}
+    for section in sections:
+        keys[(section.line, seen[section.line])] = section
+        seen[section.line] += 1
+    return keys
+
+
+def unified(before: list, after: list, context: int) -> list:
+    # Drops the ---/+++ file header; hunks start at "@@".
+    return list(difflib.unified_diff(before, after, lineterm="", n=context))[2:]
+
+
+def diff_sections(path: list, before: list, after: list, context: int, changes: list, stats: dict) -> None:
+    before_keys = keyed(before)
+    after_keys = keyed(after)
+    nested = {key for keys in (before_keys, after_keys) for key, section in keys.items() if section.children}
+    # Plain lines at this level are compared in order, so reordered ACL entries show up.
+    before_lines = [section.line for key, section in before_keys.items() if key not in nested]
+    after_lines = [section.line for key, section in after_keys.items() if key not in nested]
+    if before_lines != after_lines:
+        hunks = unified(before_lines, after_lines, context)
+        stats["lines_added"] += sum(1 for line in hunks if line.startswith("+"))
+        stats["lines_removed"] += sum(1 for line in hunks if line.startswith("-"))
+        changes.append({"path": path, "status": "changed", "diff": hunks})
+
+    for key in dict.fromkeys([*after_keys, *before_keys]):
+        if key not in nested:
+            continue
+        old, new = before_keys.get(key), after_keys.get(key)
+        if old is None:
+            lines = new.render()
+            stats["sections_added"] += 1
+            stats["lines_added"] += len(lines)
+            changes.append({"path": path + [new.line], "status": "added", "lines": lines})
+        elif new is None:
+            lines = old.render()
+            stats["sections_removed"] += 1
+            stats["lines_removed"] += len(lines)
+            changes.append({"path": path + [old.line], "status": "removed", "lines": lines})
+        elif old.digest == new.digest:
+            stats["sections_unchanged"] += 1
+        else:
+            stats["sections_changed"] += 1
+            diff_sections(path + [old.line], old.children, new.children, context, changes, stats)
+
+
+def diff_configs(before: ConfigSection, after: ConfigSection, context: int = 3) -> dict:
+    # Walks both trees top-down and stops at any section whose digests match, so
+    # unchanged blocks cost one comparison however large they are.
+    stats = dict.fromkeys(STAT_NAMES, 0)
+    changes = []
+    if before.digest != after.digest:
+        diff_sections([], before.children, after.children, context, changes, stats)
+    return {
+        "identical": before.digest == after.digest,
+        "summary": {"lines_before": before.size - 1, "lines_after": after.size - 1, **stats},
+        "changes": changes,
+    }
+
+
+def record_digest(record) -> bytes:
+    encoded = json.dumps(record, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.blake2b(encoded, digest_size=16).digest()
+
+
+def record_key(record, fields: list) -> tuple:
+    if not isinstance(record, dict):
+        raise ValueError("Keyed record diffs need object records.")
+    return tuple(record.get(field) for field in fields)
+
+
+def diff_records(before: list, after: list, key_fields: list = ()) -> dict:
+    # With key_fields, rows are matched by key and changed rows list their changed
+    # fields; without, rows are compared as multisets of row digests.
+    summary = {"before": len(before), "after": len(after), "unchanged": 0, "changed": 0, "added": 0, "removed": 0}
+    added, removed, changed = [], [], []
+    if key_fields:
+        old_rows = {}
+        for record in before:
+            old_rows.setdefault(record_key(record, key_fields), []).append(record)
+        for record in after:
+            key = record_key(record, key_fields)
+            matches = old_rows.get(key)
+            if not matches:
+                added.append(record)
+                continue
+            old = matches.pop(0)
+            if record_digest(old) == record_digest(record):
+                summary["unchanged"] += 1
+                continue
+            fields = {
+                name: [old.get(name), record.get(name)]
+                for name in dict.fromkeys([*old, *record])
+                if old.get(name) != record.get(name)
+            }
+            changed.append({"key": dict(zip(key_fields, key)), "fields": fields})
+        removed = [record for rows in old_rows.values() for record in rows]
+    else:
+        remaining = collections.Counter(record_digest(record) for record in before)
+        for record in after:
+            digest = record_digest(record)
+            if remaining[digest] > 0:
+                remaining[digest] -= 1
+                summary["unchanged"] += 1
+            else:
+                added.append(record)
+        for record in before:
+            digest = record_digest(record)
+            if remaining[digest] > 0:
+                remaining[digest] -= 1
+                removed.append(record)
+    summary.update(changed=len(changed), added=len(added), removed=len(removed))
+    identical = not (added or removed or changed)
+    return {"identical": identical, "summary": summary, "added": added, "removed": removed, "changed": changed}
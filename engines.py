@@ -0,0 +1,130 @@
+import importlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+# Engine name -> modules it needs. jinja2 is listed for warm-up and profiling only;
+# Flask imports it anyway.
+ENGINES = {
+    "textfsm": ("textfsm",),
+    "ttp": ("ttp",),
+    "xpath": ("lxml.etree",),
+    "jsonschema": ("jsonschema",),
+    "jmespath": ("jmespath",),
+    "xmltodict": ("xmltodict",),
+    "yaml": ("yaml",),
+    "jinja2": ("jinja2",),
+}
+
+
+class LazyModule:
+    # Stands in for a module and imports it on first attribute access, so an engine
+    # costs nothing until a request needs it. importlib's module locks make the
+    # first access safe from several threads.
+    def __init__(self, name: str):
+        self.__dict__["_lazy_name"] = name
+        self.__dict__["_lazy_module"] = None
+
+    def __getattr__(self, attr: str):
+        module = self._lazy_module
+        if module is None:
+            module = importlib.import_module(self._lazy_name)
+            self.__dict__["_lazy_module"] = module
+        return getattr(module, attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._lazy_module is not None else "not loaded"
+        return f"<lazy module {self._lazy_name!r} ({state})>"
+
+
+def lazy(name: str) -> LazyModule:
+    return LazyModule(name)
+
+
+def current_rss_mb() -> float:
+    try:
+        with open("/proc/self/statm", encoding="ascii") as handle:
+            pages = int(handle.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def parse_engine_names(value: str) -> list:
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    if "all" in names:
+        return list(ENGINES)
+    unknown = [name for name in names if name not in ENGINES]
+    if unknown:
+        raise ValueError(f"Unknown engine(s): {', '.join(unknown)}; choose from {', '.join(ENGINES)}")
+    return names
+
+
+def warm_up(names: list) -> list:
+    # Imports the given engines now and returns [(name, seconds, rss growth in MB)].
+    report = []
+    for name in names:
+        start = time.perf_counter()
+        rss = current_rss_mb()
+        for module in ENGINES[name]:
+            importlib.import_module(module)
+        report.append((name, time.perf_counter() - start, current_rss_mb() - rss))
+    return report
+
+
+def profile_child(app_module: str) -> None:
+    start = time.perf_counter()
+    base_rss = current_rss_mb()
+    importlib.import_module(app_module)
+    result = {
+        "app_import_ms": round((time.perf_counter() - start) * 1000, 1),
+        "app_rss_mb": round(current_rss_mb() - base_rss, 1),
+        "rss_mb": round(current_rss_mb(), 1),
+        "preloaded": [name for name, modules in ENGINES.items() if all(m in sys.modules for m in modules)],
+        "engines": [
+            {"engine": name, "import_ms": round(seconds * 1000, 1), "rss_mb": round(rss, 1)}
+            for name, seconds, rss in warm_up(list(ENGINES))
+        ],
+    }
+    print(json.dumps(result))
+
+
+def parse_importtime(text: str) -> list:
+    # "import time: self [us] | cumulative | imported package" -> top-level entries.
+    entries = []
+    for line in text.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, self_us, cumulative_us, name = [part.strip() for part in line.replace("import time:", "|").split("|")]
+        entries.append((name, int(self_us), int(cumulative_us)))
+    return entries
+
+
+def profile_startup(app_module: str = "app", top: int = 15) -> dict:
+    # Runs a fresh interpreter with -X importtime so numbers reflect a cold start.
+    command = [sys.executable, "-X", "importtime", "-c", f"import engines; engines.profile_child({app_module!r})"]
+    env = dict(os.environ, ENGINE_WARMUP="", TEMPLATE_LIBRARY_PRELOAD="0")
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    completed = subprocess.run(command, capture_output=True, text=True, env=env, cwd=cwd, check=True)
+    report = json.loads(completed.stdout.strip().splitlines()[-1])
+    modules = sorted(parse_importtime(completed.stderr), key=lambda entry: entry[1], reverse=True)
+    report["slowest_modules"] = [
+        {"module": name, "self_ms": round(self_us / 1000, 1), "cumulative_ms": round(cumulative_us / 1000, 1)}
+        for name, self_us, cumulative_us in modules[:top]
+    ]
+    return report
+
+
+def print_startup_profile(report: dict) -> None:
+    print(f"app import: {report['app_import_ms']} ms, +{report['app_rss_mb']} MB (RSS {report['rss_mb']} MB)")
+    print(f"engines loaded at import: {', '.join(report['preloaded']) or 'none'}")
+    print("\nfirst use of each engine:")
+    for item in report["engines"]:
+        print(f"  {item['engine']:<12} {item['import_ms']:>8} ms  {item['rss_mb']:>+7} MB")
+    print("\nslowest modules by self time (app import and engine first use):")
+    for item in report["slowest_modules"]:
+        print(f"  {item['module']:<40} {item['self_ms']:>8} ms  (cumulative {item['cumulative_ms']} ms)")
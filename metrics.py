@@ -0,0 +1,203 @@
+import bisect
+import contextlib
+import threading
+import time
+
+from flask import Response, g, has_request_context, request
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+
+
+def escape_label(value: object) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labelnames: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{escape_label(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{format_labels(self.labelnames, labels)} {format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (last slot is +Inf), sum]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, list(counts), total) for labels, (counts, total) in self._values.items())
+        for labels, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{format_labels(self.labelnames, labels, le)} {cumulative}")
+            label_text = format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self.metrics = []
+        self.collectors = []
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = ()) -> Counter:
+        metric = Counter(f"{self.prefix}_{name}", documentation, labelnames)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        metric = Histogram(f"{self.prefix}_{name}", documentation, labelnames, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector) -> None:
+        # collector() returns [(name, type, help, [(labels dict, value), ...]), ...]
+        # for values sampled at scrape time, such as cache and pool statistics.
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for collector in self.collectors:
+            for name, metric_type, documentation, samples in collector():
+                full_name = f"{self.prefix}_{name}"
+                lines.append(f"# HELP {full_name} {documentation}")
+                lines.append(f"# TYPE {full_name} {metric_type}")
+                for labels, value in samples:
+                    label_text = format_labels(tuple(labels), tuple(labels.values()))
+                    lines.append(f"{full_name}{label_text} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry("toolkit")
+REQUESTS = REGISTRY.counter(
+    "http_requests_total", "API requests by endpoint, method and status.", ("endpoint", "method", "status")
+)
+REQUEST_DURATION = REGISTRY.histogram("http_request_duration_seconds", "API request latency.", ("endpoint",))
+REQUEST_BYTES = REGISTRY.histogram("http_request_bytes", "API request body size.", ("endpoint",), SIZE_BUCKETS)
+RESPONSE_BYTES = REGISTRY.histogram("http_response_bytes", "API response body size.", ("endpoint",), SIZE_BUCKETS)
+PHASE_DURATION = REGISTRY.histogram(
+    "phase_duration_seconds", "Time spent per request phase (parse, engine, serialize).", ("endpoint", "phase")
+)
+
+
+@contextlib.contextmanager
+def phase(name: str):
+    # Adds the elapsed time to the current request's phase totals; a no-op outside
+    # instrumented requests, so engine code can be shared with worker processes.
+    phases = g.get("metric_phases") if has_request_context() else None
+    if phases is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases[name] = phases.get(name, 0.0) + time.perf_counter() - start
+
+
+def record_request(
+    endpoint: str, method: str, status: int, start: float, request_bytes: int, response_bytes: int, phases: dict
+) -> None:
+    REQUESTS.inc((endpoint, method, str(status)))
+    REQUEST_DURATION.observe((endpoint,), time.perf_counter() - start)
+    REQUEST_BYTES.observe((endpoint,), request_bytes)
+    RESPONSE_BYTES.observe((endpoint,), response_bytes)
+    for name, elapsed in phases.items():
+        PHASE_DURATION.observe((endpoint, name), elapsed)
+
+
+class CountingIterable:
+    def __init__(self, iterable):
+        self.iterable = iterable
+        self.size = 0
+
+    def __iter__(self):
+        for chunk in self.iterable:
+            self.size += len(chunk)
+            yield chunk
+
+    def close(self) -> None:
+        close = getattr(self.iterable, "close", None)
+        if close is not None:
+            close()
+
+
+def init_app(app, path: str = "/metrics", prefix: str = "/api/") -> None:
+    @app.before_request
+    def start_request_metrics():
+        if request.path.startswith(prefix):
+            g.metric_start = time.perf_counter()
+            g.metric_phases = {}
+
+    @app.after_request
+    def finish_request_metrics(response):
+        start = g.get("metric_start")
+        if start is None:
+            return response
+        endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        # Compressed request bodies lose Content-Length once transport.RequestDecoder wraps them.
+        request_bytes = request.environ.get("toolkit.encoded_length") or request.content_length or 0
+        args = (endpoint, request.method, response.status_code, start, request_bytes)
+        phases = g.metric_phases
+        if response.is_streamed:
+            # Streamed bodies are produced after this hook; count bytes and phases
+            # as they are sent and record when the server closes the response.
+            body = CountingIterable(response.response)
+            response.response = body
+            response.call_on_close(lambda: record_request(*args, body.size, phases))
+        else:
+            record_request(*args, response.content_length or 0, phases)
+        return response
+
+    @app.get(path)
+    def metrics_endpoint():
+        return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,416 @@
+import ast
+import builtins
+import collections
+import contextlib
+import datetime
+import functools
+import io
+import ipaddress
+import itertools
+import json
+import math
+import os
+import random
+import re
+import signal
+import threading
+import time
+import traceback
+import uuid
+from multiprocessing.managers import BaseManager
+
+from workers import process_context
+
+try:
+    import resource
+except ImportError:  # not available on Windows; limits are skipped there
+    resource = None
+
+
+def env_number(name: str, default: float) -> float:
+    try:
+        return max(0.0, float(os.environ.get(name, default)))
+    except ValueError:
+        return default
+
+
+PLAYGROUND_MAX_SESSIONS = int(env_number("PLAYGROUND_MAX_SESSIONS", 32)) or 1
+PLAYGROUND_IDLE_TTL = env_number("PLAYGROUND_IDLE_TTL", 1800)
+PLAYGROUND_CPU_SECONDS = int(env_number("PLAYGROUND_CPU_SECONDS", 10))
+PLAYGROUND_MEMORY_MB = int(env_number("PLAYGROUND_MEMORY_MB", 512))
+PLAYGROUND_WALL_TIMEOUT = env_number("PLAYGROUND_WALL_TIMEOUT", 30)
+
+
+def parse_playground_var(raw_text: str):
+    text = (raw_text or "").strip()
+    if not text:
+        return {"value": None, "type": "NoneType", "warning": "Empty value loaded as None."}
+
+    try:
+        value = ast.literal_eval(text)
+        return {"value": value, "type": type(value).__name__, "warning": ""}
+    except Exception:
+        pass
+
+    try:
+        value = json.loads(text)
+        return {"value": value, "type": type(value).__name__, "warning": ""}
+    except Exception:
+        pass
+
+    # Fallback to raw string so session can still start with user input.
+    return {
+        "value": raw_text,
+        "type": "str",
+        "warning": "Could not parse as Python literal/JSON. Loaded as plain string.",
+    }
+
+
+def make_globals(var1_value, var2_value, var3_value):
+    return {
+        "__builtins__": builtins.__dict__,
+        "json": json,
+        "re": re,
+        "math": math,
+        "datetime": datetime,
+        "ipaddress": ipaddress,
+        "itertools": itertools,
+        "functools": functools,
+        "collections": collections,
+        "random": random,
+        "value": var1_value,
+        "var1": var1_value,
+        "var2": var2_value,
+        "var3": var3_value,
+    }
+
+
+def serialize(value):
+    try:
+        json.dumps(value)
+        return value
+    except TypeError:
+        return repr(value)
+
+
+class CPUTimeLimitExceeded(Exception):
+    pass
+
+
+def _raise_cpu_limit(signum, frame):
+    raise CPUTimeLimitExceeded("CPU time limit exceeded.")
+
+
+@contextlib.contextmanager
+def cpu_time_limit(seconds: int):
+    # RLIMIT_CPU counts the whole process lifetime, so each exec gets a soft limit
+    # of "used so far + seconds"; SIGXCPU then raises inside the user code.
+    if resource is None or not seconds:
+        yield
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    used = int(usage.ru_utime + usage.ru_stime)
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = used + seconds + 1
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+    try:
+        yield
+    finally:
+        resource.setrlimit(resource.RLIMIT_CPU, (hard, hard))
+
+
+PLAYGROUND_CODE_CACHE_SIZE = 64
+
+
+def compile_code(code_text: str) -> tuple:
+    # Compiles once, interactive-interpreter style: a trailing expression statement
+    # is split off and compiled in eval mode so its value can be shown without
+    # running the code a second time.
+    tree = ast.parse(code_text, filename="<playground>", mode="exec")
+    expr_code = None
+    if tree.body and isinstance(tree.body[-1], ast.Expr):
+        expr_node = ast.Expression(tree.body.pop().value)
+        expr_code = compile(expr_node, "<playground>", "eval")
+    body_code = compile(tree, "<playground>", "exec") if tree.body else None
+    return body_code, expr_code
+
+
+def cached_compile(code_cache: collections.OrderedDict, code_text: str) -> tuple:
+    compiled = code_cache.get(code_text)
+    if compiled is not None:
+        code_cache.move_to_end(code_text)
+        return compiled
+    compiled = code_cache[code_text] = compile_code(code_text)
+    while len(code_cache) > PLAYGROUND_CODE_CACHE_SIZE:
+        code_cache.popitem(last=False)
+    return compiled
+
+
+def format_user_traceback(exc: BaseException) -> str:
+    # Drop the worker's own frames so tracebacks start at the user's code.
+    tb = exc.__traceback__
+    while tb is not None and tb.tb_frame.f_code.co_filename != "<playground>":
+        tb = tb.tb_next
+    if tb is None or isinstance(exc, SyntaxError):
+        return "".join(traceback.format_exception_only(type(exc), exc))
+    # On a CPU limit the innermost frame is the SIGXCPU handler, not user code.
+    last = tb
+    while last.tb_next is not None:
+        if last.tb_next.tb_frame.f_code is _raise_cpu_limit.__code__:
+            last.tb_next = None
+            break
+        last = last.tb_next
+    return "".join(traceback.format_exception(type(exc), exc, tb))
+
+
+def run_code(session_globals: dict, code_text: str, cpu_seconds: int = 0, code_cache=None) -> dict:
+    stdout_buffer = io.StringIO()
+    stderr_buffer = io.StringIO()
+
+    result = None
+    has_result = False
+    try:
+        if code_cache is None:
+            body_code, expr_code = compile_code(code_text)
+        else:
+            body_code, expr_code = cached_compile(code_cache, code_text)
+        with cpu_time_limit(cpu_seconds):
+            with contextlib.redirect_stdout(stdout_buffer), contextlib.redirect_stderr(stderr_buffer):
+                if body_code is not None:
+                    exec(body_code, session_globals)
+                if expr_code is not None:
+                    result = eval(expr_code, session_globals)
+                    # Like the interactive prompt, a None value is not echoed.
+                    has_result = result is not None
+    except Exception as exc:
+        stderr_buffer.write(format_user_traceback(exc))
+
+    payload_out = {"stdout": stdout_buffer.getvalue(), "stderr": stderr_buffer.getvalue()}
+    if has_result:
+        payload_out["result"] = serialize(result)
+
+    if not payload_out["stdout"] and not payload_out["stderr"] and not has_result:
+        payload_out["stdout"] = "(no output)"
+    return payload_out
+
+
+def session_worker(conn, variables: tuple, memory_mb: int) -> None:
+    # Runs in the session's child process; state lives only in session_globals.
+    if resource is not None and memory_mb:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    if hasattr(signal, "SIGXCPU"):
+        signal.signal(signal.SIGXCPU, _raise_cpu_limit)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    session_globals = make_globals(*variables)
+    code_cache = collections.OrderedDict()
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+        try:
+            reply = run_code(session_globals, message["code"], message.get("cpu_seconds", 0), code_cache)
+        except MemoryError:
+            reply = {"stdout": "", "stderr": "MemoryError: session memory limit exceeded.\n"}
+        try:
+            conn.send(reply)
+        except Exception:
+            conn.send({"stdout": "", "stderr": traceback.format_exc()})
+
+
+class PlaygroundSession:
+    def __init__(self, ctx, variables: tuple, memory_mb: int):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=session_worker,
+            args=(child_conn, variables, memory_mb),
+            name="playground-session",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+        self.executions = 0
+
+    def execute(self, code_text: str, cpu_seconds: int, wall_timeout: float) -> dict:
+        self.conn.send({"code": code_text, "cpu_seconds": cpu_seconds})
+        if not self.conn.poll(wall_timeout or None):
+            raise TimeoutError("Execution timed out.")
+        self.executions += 1
+        return self.conn.recv()
+
+    def close(self) -> None:
+        try:
+            self.conn.send(None)
+        except Exception:
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(timeout=1)
+        self.conn.close()
+
+
+class PlaygroundBroker:
+    # Owns every playground session process. Can run inside the web process or be
+    # shared by several web workers through serve_broker()/connect_broker().
+    def __init__(
+        self,
+        max_sessions: int = PLAYGROUND_MAX_SESSIONS,
+        idle_ttl: float = PLAYGROUND_IDLE_TTL,
+        cpu_seconds: int = PLAYGROUND_CPU_SECONDS,
+        memory_mb: int = PLAYGROUND_MEMORY_MB,
+        wall_timeout: float = PLAYGROUND_WALL_TIMEOUT,
+    ):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.wall_timeout = wall_timeout
+        self.evictions = 0
+        self.expirations = 0
+        self.timeouts = 0
+        self._ctx = process_context()
+        self._sessions = collections.OrderedDict()
+        self._lock = threading.Lock()
+        reaper = threading.Thread(target=self._reap_forever, name="playground-reaper", daemon=True)
+        reaper.start()
+
+    def _reap_forever(self) -> None:
+        while True:
+            time.sleep(max(1.0, min(self.idle_ttl / 4, 60.0)) if self.idle_ttl else 60.0)
+            self.reap()
+
+    def reap(self) -> None:
+        if not self.idle_ttl:
+            return
+        cutoff = time.monotonic() - self.idle_ttl
+        with self._lock:
+            expired = [
+                sid
+                for sid, session in self._sessions.items()
+                if session.last_used < cutoff and not session.lock.locked()
+            ]
+            closing = [self._sessions.pop(sid) for sid in expired]
+            self.expirations += len(closing)
+        for session in closing:
+            session.close()
+
+    def start(self, variables: tuple) -> str:
+        session = PlaygroundSession(self._ctx, tuple(variables), self.memory_mb)
+        session_id = str(uuid.uuid4())
+        with self._lock:
+            self._sessions[session_id] = session
+            evicted = []
+            while len(self._sessions) > self.max_sessions:
+                evicted.append(self._sessions.popitem(last=False)[1])
+                self.evictions += 1
+        for old in evicted:
+            old.close()
+        return session_id
+
+    def execute(self, session_id: str, code_text: str) -> dict:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return {"ok": False, "error": "Session not found. Start a new session."}
+            self._sessions.move_to_end(session_id)
+            session.last_used = time.monotonic()
+
+        with session.lock:
+            try:
+                result = session.execute(code_text, self.cpu_seconds, self.wall_timeout)
+            except TimeoutError:
+                self.timeouts += 1
+                self._drop(session_id, session)
+                return {
+                    "ok": False,
+                    "error": (
+                        f"Execution exceeded {self.wall_timeout:g}s; the session was terminated. "
+                        "Start a new session."
+                    ),
+                }
+            except (EOFError, OSError, BrokenPipeError):
+                self._drop(session_id, session)
+                return {"ok": False, "error": "Session process exited (memory or CPU limit). Start a new session."}
+            session.last_used = time.monotonic()
+        return {"ok": True, "result": result}
+
+    def _drop(self, session_id: str, session: PlaygroundSession) -> None:
+        with self._lock:
+            if self._sessions.get(session_id) is session:
+                del self._sessions[session_id]
+        session.process.kill()
+        session.close()
+
+    def reset(self, session_id: str) -> bool:
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        session.close()
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._sessions),
+                "maxsize": self.max_sessions,
+                "idle_ttl": self.idle_ttl,
+                "cpu_seconds": self.cpu_seconds,
+                "memory_mb": self.memory_mb,
+                "wall_timeout": self.wall_timeout,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "timeouts": self.timeouts,
+            }
+
+
+class BrokerManager(BaseManager):
+    pass
+
+
+def broker_address(text: str):
+    # "host:port" for TCP, anything else is a Unix socket path.
+    host, sep, port = text.rpartition(":")
+    if sep and port.isdigit():
+        return (host or "127.0.0.1", int(port))
+    return text
+
+
+BROKER_AUTHKEY_MIN_LENGTH = 16
+
+
+def broker_authkey() -> bytes:
+    # The broker runs arbitrary Python for anyone holding this key, so there is no
+    # default; both the broker and every web worker must be given the same secret.
+    key = os.environ.get("PLAYGROUND_BROKER_AUTHKEY", "")
+    if len(key) < BROKER_AUTHKEY_MIN_LENGTH:
+        raise RuntimeError(
+            f"PLAYGROUND_BROKER_AUTHKEY must be set to a secret of at least {BROKER_AUTHKEY_MIN_LENGTH} "
+            "characters, e.g. python -c 'import secrets; print(secrets.token_hex(32))'"
+        )
+    return key.encode("utf-8")
+
+
+def serve_broker(address: str) -> None:
+    broker = PlaygroundBroker()
+    BrokerManager.register("get_broker", callable=lambda: broker)
+    manager = BrokerManager(address=broker_address(address), authkey=broker_authkey())
+    server = manager.get_server()
+    print(f"Playground broker listening on {address}")
+    server.serve_forever()
+
+
+def connect_broker(address: str):
+    BrokerManager.register("get_broker")
+    manager = BrokerManager(address=broker_address(address), authkey=broker_authkey())
+    manager.connect()
+    return manager.get_broker()
@@ -50,13 +50,13 @@ const tools = [
   {
     id: 'convert',
     title: 'Data Format Converter',
-    description: 'Convert between JSON, XML, and YAML.',
+    description: 'Convert between JSON, XML, YAML, CSV, and NDJSON.',
     useCase: 'Use case: normalize data formats between systems, such as YAML vars to JSON APIs or XML exports to JSON.',
     chooser: 'Best for: fast format translation. Alternative: keep source format and use XPath/JMESPath directly when conversion is unnecessary.',
     endpoint: '/api/convert',
     fields: [
-      { key: 'source_format', label: 'Source Format', type: 'select', options: ['json', 'xml', 'yaml'], value: 'json' },
-      { key: 'target_format', label: 'Target Format', type: 'select', options: ['json', 'xml', 'yaml'], value: 'yaml' },
+      { key: 'source_format', label: 'Source Format', type: 'select', options: ['json', 'xml', 'yaml', 'csv', 'ndjson'], value: 'json' },
+      { key: 'target_format', label: 'Target Format', type: 'select', options: ['json', 'xml', 'yaml', 'csv', 'ndjson'], value: 'yaml' },
       { key: 'content', label: 'Content', type: 'textarea', value: '{\n  "device": {\n    "hostname": "R1-EDGE",\n    "site": "NYC1",\n    "asn": 65001,\n    "interfaces": [\n      {"name": "GigabitEthernet0/0", "ip": "10.10.10.1/30"},\n      {"name": "GigabitEthernet0/1", "ip": "172.16.20.1/24"}\n    ]\n  }\n}' }
     ]
   },
@@ -0,0 +1,174 @@
+import gzip
+import io
+import json
+import os
+import zlib
+
+from flask import jsonify, request
+from werkzeug.exceptions import BadRequest, HTTPException, RequestEntityTooLarge
+from werkzeug.wrappers import Response
+from werkzeug.wsgi import get_input_stream
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+REQUEST_MAX_DECODED_BYTES = int(float(os.environ.get("REQUEST_MAX_DECODED_MB", "256")) * 1024 * 1024)
+COMPRESSION_MIN_BYTES = int(os.environ.get("COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.environ.get("COMPRESSION_GZIP_LEVEL", "5"))
+ZSTD_LEVEL = int(os.environ.get("COMPRESSION_ZSTD_LEVEL", "3"))
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/x-ndjson", "application/xml", "application/yaml")
+# Original (encoded) body size, for metrics once Content-Length is dropped.
+ENCODED_LENGTH_KEY = "toolkit.encoded_length"
+
+
+def decoders() -> dict:
+    # Content-Encoding -> factory wrapping a byte stream in a decompressing reader.
+    available = {
+        "gzip": lambda source: gzip.GzipFile(fileobj=source, mode="rb"),
+        "x-gzip": lambda source: gzip.GzipFile(fileobj=source, mode="rb"),
+    }
+    if zstandard is not None:
+        available["zstd"] = lambda source: zstandard.ZstdDecompressor().stream_reader(
+            source, read_across_frames=True
+        )
+    return available
+
+
+def response_encodings() -> list:
+    # Server preference when the client rates several encodings equally.
+    return ["zstd", "gzip"] if zstandard is not None else ["gzip"]
+
+
+class DecodedBody(io.RawIOBase):
+    # Decompresses while the body is read, so form parsing and the streaming
+    # endpoints never hold the whole decoded request. Reading past max_bytes is a 413
+    # (decompression bombs); corrupt input is a 400.
+    def __init__(self, reader, encoding: str, max_bytes: int):
+        self.reader = reader
+        self.encoding = encoding
+        self.max_bytes = max_bytes
+        self.decoded = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        try:
+            data = self.reader.read(len(buffer))
+        except HTTPException:
+            raise
+        except Exception as exc:
+            raise BadRequest(f"Could not decode {self.encoding} request body: {exc}") from exc
+        self.decoded += len(data)
+        if self.decoded > self.max_bytes:
+            raise RequestEntityTooLarge(f"Decoded request body exceeds {self.max_bytes // (1024 * 1024)} MB.")
+        buffer[: len(data)] = data
+        return len(data)
+
+
+class RequestDecoder:
+    # WSGI middleware for Content-Encoding request bodies; views see plain bytes.
+    def __init__(self, wsgi_app, max_bytes: int = REQUEST_MAX_DECODED_BYTES):
+        self.wsgi_app = wsgi_app
+        self.max_bytes = max_bytes
+        self.decoders = decoders()
+
+    def __call__(self, environ, start_response):
+        encoding = environ.get("HTTP_CONTENT_ENCODING", "").strip().lower()
+        if encoding in {"", "identity"}:
+            return self.wsgi_app(environ, start_response)
+        factory = self.decoders.get(encoding)
+        if factory is None:
+            message = f"Unsupported Content-Encoding {encoding!r}; use {', '.join(response_encodings())}."
+            response = Response(json.dumps({"ok": False, "error": message}), 415, mimetype="application/json")
+            response.headers["Accept-Encoding"] = ", ".join(response_encodings())
+            return response(environ, start_response)
+
+        source = get_input_stream(environ)
+        environ[ENCODED_LENGTH_KEY] = int(environ.get("CONTENT_LENGTH") or 0)
+        environ["wsgi.input"] = io.BufferedReader(DecodedBody(factory(source), encoding, self.max_bytes))
+        # The decoded length is unknown; the wrapped stream ends where the body does.
+        environ["wsgi.input_terminated"] = True
+        environ.pop("CONTENT_LENGTH", None)
+        del environ["HTTP_CONTENT_ENCODING"]
+        return self.wsgi_app(environ, start_response)
+
+
+class CompressedStream:
+    # Compresses a streamed body chunk by chunk. Each chunk is flushed so NDJSON
+    # results still reach the client as they are produced.
+    def __init__(self, iterable, encoding: str):
+        self.iterable = iterable
+        if encoding == "zstd":
+            self.compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+            self.flush_mode = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        else:
+            self.compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+            self.flush_mode = zlib.Z_SYNC_FLUSH
+
+    def __iter__(self):
+        for chunk in self.iterable:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            if chunk:
+                yield self.compressor.compress(chunk) + self.compressor.flush(self.flush_mode)
+        yield self.compressor.flush()
+
+    def close(self) -> None:
+        close = getattr(self.iterable, "close", None)
+        if close is not None:
+            close()
+
+
+def compress_bytes(data: bytes, encoding: str) -> bytes:
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def compress_response(response):
+    if (
+        request.method == "HEAD"
+        or response.status_code < 200
+        or response.status_code in {204, 304}
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+        or not response.mimetype.startswith(COMPRESSIBLE_TYPES)
+    ):
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = request.accept_encodings.best_match(response_encodings())
+    if encoding is None:
+        return response
+    if response.is_streamed:
+        response.response = CompressedStream(response.response, encoding)
+        response.headers.pop("Content-Length", None)
+    else:
+        body = response.get_data()
+        if len(body) < COMPRESSION_MIN_BYTES:
+            return response
+        response.set_data(compress_bytes(body, encoding))
+    response.headers["Content-Encoding"] = encoding
+    # The compressed bytes differ from the identity body, so a strong validator
+    # becomes weak; If-None-Match still matches it under weak comparison.
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_app(app, compress: bool = True) -> None:
+    # Register after metrics.init_app so response sizes are measured compressed.
+    app.wsgi_app = RequestDecoder(app.wsgi_app)
+
+    @app.errorhandler(BadRequest)
+    @app.errorhandler(RequestEntityTooLarge)
+    def body_error(exc):
+        if not request.path.startswith("/api/"):
+            return exc
+        return jsonify({"ok": False, "error": exc.description}), exc.code
+
+    if compress:
+        app.after_request(compress_response)
@@ -0,0 +1,194 @@
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+
+
+class PoolSaturated(Exception):
+    pass
+
+
+class WorkerTimeout(Exception):
+    pass
+
+
+class WorkerError(Exception):
+    pass
+
+
+class WorkerStartError(WorkerError):
+    pass
+
+
+def preload_modules() -> list:
+    # The server imports the module defining the job functions once, so children
+    # fork with it loaded. That is __main__ only when app.py is the entry script;
+    # another entry script (gunicorn, an embedding or test script) is not run in
+    # the server.
+    entry = getattr(sys.modules.get("__main__"), "__file__", None) or ""
+    return ["__main__" if os.path.basename(entry) == "app.py" else "app", "playground", "workers"]
+
+
+def process_context():
+    # forkserver children fork from a single-threaded server instead of the
+    # multi-threaded web worker; spawn is the portable fallback.
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context("forkserver")
+        ctx.set_forkserver_preload(preload_modules())
+        return ctx
+    return multiprocessing.get_context("spawn")
+
+
+def worker_loop(conn) -> None:
+    # Each message is (func, args); func must be a picklable module-level function.
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+        func, args = message
+        try:
+            reply = ("ok", func(*args))
+        except Exception as exc:
+            reply = ("error", str(exc))
+        try:
+            conn.send(reply)
+        except Exception as exc:
+            conn.send(("error", f"Result could not be returned: {exc}"))
+
+
+class WorkerProcess:
+    def __init__(self, ctx, name: str):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=worker_loop, args=(child_conn,), name=name, daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def call(self, func, args: tuple, timeout: float):
+        self.conn.send((func, args))
+        if not self.conn.poll(timeout or None):
+            raise WorkerTimeout(f"Worker did not finish within {timeout:g}s.")
+        status, value = self.conn.recv()
+        if status == "error":
+            raise WorkerError(value)
+        return value
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join(timeout=1)
+        self.conn.close()
+
+
+class WorkerPool:
+    # Fixed set of persistent worker processes. A call that overruns its timeout
+    # has its process killed and replaced, so runaway work (e.g. catastrophic regex
+    # backtracking) cannot pin a core. Callers beyond max_queue waiting for a free
+    # worker, or waiting longer than queue_timeout, get PoolSaturated immediately.
+    def __init__(self, name: str, size: int, max_queue: int = 16, queue_timeout: float = 5.0):
+        self.name = name
+        self.size = size
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.calls = 0
+        self.timeouts = 0
+        self.crashes = 0
+        self.rejected = 0
+        self.busy_seconds = 0.0
+        self._waiting = 0
+        self._in_flight = 0
+        self._ctx = None
+        self._pids = set()
+        self._lock = threading.Lock()
+        self._idle = queue.LifoQueue()
+        for _ in range(size):
+            # Workers start lazily on first use.
+            self._idle.put(None)
+
+    def call(self, func, *args, timeout: float = 0):
+        with self._lock:
+            if self._waiting >= self.max_queue:
+                self.rejected += 1
+                raise PoolSaturated(f"{self.name} pool is saturated; try again shortly.")
+            self._waiting += 1
+        try:
+            worker = self._idle.get(timeout=self.queue_timeout)
+        except queue.Empty:
+            with self._lock:
+                self.rejected += 1
+            raise PoolSaturated(f"{self.name} pool is saturated; try again shortly.") from None
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+        start = time.perf_counter()
+        with self._lock:
+            self._in_flight += 1
+        try:
+            if worker is None:
+                worker = self._spawn()
+            result = worker.call(func, args, timeout)
+            self.calls += 1
+            return result
+        except WorkerTimeout:
+            self.timeouts += 1
+            self._retire(worker)
+            worker = None
+            raise
+        except (EOFError, OSError):
+            self.crashes += 1
+            if worker is not None:
+                self._retire(worker)
+            worker = None
+            raise WorkerError(f"{self.name} worker exited unexpectedly.") from None
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self.busy_seconds += time.perf_counter() - start
+            self._idle.put(worker)
+
+    def admit(self, callers: int) -> None:
+        # Rejects a batch up front when its callers could not all queue for a worker.
+        with self._lock:
+            if self._waiting + callers > self.max_queue:
+                self.rejected += 1
+                raise PoolSaturated(f"{self.name} pool is saturated; try again shortly.")
+
+    def _spawn(self) -> WorkerProcess:
+        with self._lock:
+            if self._ctx is None:
+                self._ctx = process_context()
+        try:
+            worker = WorkerProcess(self._ctx, f"{self.name}-worker")
+        except Exception as exc:
+            raise WorkerStartError(f"{self.name} worker could not start: {exc}") from exc
+        with self._lock:
+            self._pids.add(worker.process.pid)
+        return worker
+
+    def _retire(self, worker: WorkerProcess) -> None:
+        with self._lock:
+            self._pids.discard(worker.process.pid)
+        worker.kill()
+
+    def pids(self) -> set:
+        # Live worker processes, for merging per-process statistics they report.
+        with self._lock:
+            return set(self._pids)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": self.size,
+                "in_flight": self._in_flight,
+                "queued": self._waiting,
+                "max_queue": self.max_queue,
+                "calls": self.calls,
+                "timeouts": self.timeouts,
+                "crashes": self.crashes,
+                "rejected": self.rejected,
+                "busy_seconds": round(self.busy_seconds, 3),
+            }